@@ -64,6 +64,13 @@ def parse_opt(
         default=daemon_config.get("http_port", 8080)
     )
 
+    parser.add_argument(
+        "-W", "--num-workers", 
+        type=int, 
+        default=daemon_config.get("num_workers", dagent.constant.AUTO_SERVICE_NUM_WORKERS),
+        help="Number of workers executing mission steps concurrently"
+    )
+
     return parser.parse_args()
 
 def http_service(provider: dagent.service.AutoServiceProvider):
@@ -84,14 +91,19 @@ def main():
     for item in [RegistryCategory.LLM, RegistryCategory.ToolSet]:
         logger.info(f"Registered {item}: {get_registered(item)}")
     
-    service = dagent.service.AutoServiceProvider()
     args = parse_opt()
+    service = dagent.service.AutoServiceProvider(num_workers=args.num_workers)
     assert os.path.exists(args.agent_config_file), f"Config file {args.agent_config_file} not found"
     
     with open(args.agent_config_file, "rb") as fp:
         cfg = json.loads(fp.read())
 
     service.schedule(cfg)    
+    n_restored = service.restore()
+
+    if n_restored > 0:
+        logger.info(f"Resuming {n_restored} missions from checkpoints")
+
     service.start()
 
     if args.serve_interactive_agents:
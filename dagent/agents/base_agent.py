@@ -1,5 +1,6 @@
-from typing import Any
+from typing import Any, Callable, Optional, Iterator
 from dagent.models import DAgentLog, NonInteractiveDAgentLog, ChainState, Mission, DAgentResponse, OnChainData
+from dagent.utils import InferenceResultStore
 
 class InteractiveDAgentBase(object):
     def __init__(self, log: DAgentLog) -> None:
@@ -9,12 +10,14 @@ class InteractiveDAgentBase(object):
     def id(self) -> str:
         return self.log.id
 
-    def step(self, mission: Mission) -> DAgentResponse:
-        resp = self.__call__(mission)
-        
+    @property
+    def last_response(self) -> Optional[DAgentResponse]:
+        return getattr(self, '_last_response', None)
+
+    def _build_response(self, resp: DAgentLog) -> DAgentResponse:
         assert resp.scratchpad[-1]['role'] == 'assistant'
-        
-        return DAgentResponse(
+
+        self._last_response = DAgentResponse(
             content=resp.scratchpad[-1]['content'],
             onchain_data=(
                 None if resp.scratchpad[-1].get('onchain_data') is None 
@@ -22,6 +25,17 @@ class InteractiveDAgentBase(object):
             )
         )
 
+        return self._last_response
+
+    def step(self, mission: Mission) -> DAgentResponse:
+        resp = self.__call__(mission)
+        return self._build_response(resp)
+
+    def stream(self, mission: Mission) -> Iterator[str]:
+        """Yields the response as it is generated, the full response is available 
+        as `last_response` afterward. Agents that can not stream yield it at once."""
+        yield self.step(mission).content
+
     def __call__(self, log: Mission) -> DAgentLog:
         raise NotImplementedError("You must implement this method in your subclass")
 
@@ -39,9 +53,19 @@ class NonInteractiveDAgentBase(object):
 
     def step(self) -> NonInteractiveDAgentLog:
         if self.log.state == ChainState.NEW or self.log.state == ChainState.RUNNING:
-            return self.__call__()
+            # failures are reported as a new log object, keep track of it
+            self.log = self.__call__()
 
         return self.log
 
+    def notify_when_ready(self, callback: Callable[[], None]) -> bool:
+        """Returns True if the agent is waiting for something (e.g. an inference receipt) 
+        and `callback` will be fired once it can make progress; False if it is ready now."""
+
+        if self.log.state != ChainState.RUNNING or self.log.infer_receipt is None:
+            return False
+
+        return InferenceResultStore().add_done_callback(self.log.infer_receipt, callback)
+
     def __call__(self) -> NonInteractiveDAgentLog:
         raise NotImplementedError("You must implement this method in your subclass")
\ No newline at end of file
@@ -1,18 +1,25 @@
 from .base_agent import NonInteractiveDAgentBase, InteractiveDAgentBase
 from dagent.models import Mission, NonInteractiveDAgentLog
 import logging
-from dagent.models import ChainState, InferenceState
+from dagent.models import ChainState, InferenceState, InferenceResult
 
 logger = logging.getLogger(__name__)
 
 from dagent.registry import get_cls, RegistryCategory, register_decorator
 from dagent.models import ClassRegistration, DAgentLog
-from typing import List
+from typing import List, Optional, Tuple, Callable
+from concurrent.futures import Future
 from dagent.tools import ToolsetComposer
+from dagent.tools.observation_toolset import ObservationToolset, budget_observation
+from dagent.component_pool import build_component, build_components
 from dagent.llm import AsyncChatCompletion
+from dagent import constant as C
+from dagent.utils import extract_json_object, JSONObjectStreamParser, InferenceResultStore
+from dagent.prompt_cache import PromptCache, compile_system_prompt, prompt_key, toolset_key
+from dagent.context_budget import ContextBudget
 import json
 
-def format_prompt_v2(base_system_prompt: str, toolsets: ToolsetComposer):
+def format_prompt_v2(base_system_prompt: str, toolsets: ToolsetComposer, tool_instruction: Optional[str]=None, max_parallel_actions: int=0):
     template_prompt = '''
 You have access to the following toolset:
 
@@ -22,7 +29,7 @@ Your reply to user's message must be a single JSON object with exact three keys
 thought: your own thought about the next step, reflecting your unique persona.
 action: must be one of {toolnames}.
 action_input: provide the necessary parameters for the chosen action, separating multiple parameters with the | character.
-
+{parallel_actions}
 OR with exact two keys as follows.
 thought: your final thought to conclude.
 final_answer: your conclusion.
@@ -33,65 +40,154 @@ Again, only return a single JSON!
 '''
 
     tool_names = ', '.join(toolsets.names)
-    base_tool_str = toolsets.render_instruction()
+    base_tool_str = tool_instruction if tool_instruction is not None else toolsets.render_instruction()
+
+    parallel_actions = ''
+
+    if max_parallel_actions > 1:
+        parallel_actions = f'''
+OR, to take up to {max_parallel_actions} independent actions at once, with exact two keys as follows.
+thought: your own thought about the next steps, reflecting your unique persona.
+actions: a list of objects, each with exact two keys action and action_input as described above.
+'''
 
     system_prompt = template_prompt.format(
         tools=base_tool_str,
         toolnames=tool_names,
+        parallel_actions=parallel_actions,
         base_system_prompt=base_system_prompt
     )
 
     return system_prompt
 
+def compile_react_system_prompt(base_system_prompt: str, toolsets: ToolsetComposer, toolsets_cfg: List[ClassRegistration], cacheable: bool=True, max_parallel_actions: int=0) -> str:
+    tool_instruction = PromptCache().get_or_compile(
+        prompt_key("tools", toolset_key(toolsets_cfg)), toolsets.render_instruction
+    )
 
-def render_conversation(log: NonInteractiveDAgentLog, tool: ToolsetComposer):
-    system_prompt = format_prompt_v2(log, tool)
+    if not cacheable:
+        return format_prompt_v2(base_system_prompt, toolsets, tool_instruction, max_parallel_actions)
 
-    conversation = [
-        {
+    key = prompt_key("react", base_system_prompt, toolset_key(toolsets_cfg), max_parallel_actions)
+    return PromptCache().get_or_compile(key, lambda: format_prompt_v2(base_system_prompt, toolsets, tool_instruction, max_parallel_actions))
+
+class ReactConversationBuilder(object):
+    """Renders the conversation of a ReAct scratchpad. Only the last scratchpad entry is ever 
+    updated in place, so the messages of the earlier ones are rendered once and cached."""
+
+    def __init__(self, system_prompt: str, system_reminder: Optional[str]=None, reminder_at_tail: bool=False, context_budget: Optional[ContextBudget]=None) -> None:
+        self.system_prompt = system_prompt
+        self.system_reminder = system_reminder
+        self.context_budget = context_budget
+
+        # remind only in the last user message instead of repeating it in every turn
+        self.reminder_at_tail = reminder_at_tail
+
+        self._system_message = {
             "role": "system",
             "content": system_prompt
         }
-    ]
 
-    for item in log.scratchpad:
+        self._scratchpad = None
+        self._summarized_until = 0
+        self._frozen_messages: List[dict] = []
+        self._n_frozen = 0
+
+    def _render_item(self, item: dict, is_tail: bool) -> List[dict]:
+        messages = []
         user_message = {}
-        for k in ['task', 'observation']:
+
+        for k in ['task', 'summary', 'observation', 'observations']:
             if k in item:
                 user_message[k] = item[k]
 
         assistant_message = {}
-        for k in ['thought', 'action', 'action_input', 'final_answer']:
+        for k in ['thought', 'action', 'action_input', 'actions', 'final_answer']:
             if k in item:
                 assistant_message[k] = item[k]
 
         if len(assistant_message) > 0:
-            conversation.append({
+            messages.append({
                 "role": "assistant",
                 "content": json.dumps(assistant_message)
             })
 
-        if isinstance(log, NonInteractiveDAgentLog):    
-            conversation.append({
-                "role": "user",
-                "content": json.dumps({
-                    **user_message,
-                    "system_reminder": log.mission.system_reminder or "Please follow the instructions carefully"
-                })
-            })
+        if self.system_reminder is not None and (is_tail or not self.reminder_at_tail):
+            user_message["system_reminder"] = self.system_reminder
 
-        else:
-            conversation.append({
-                "role": "user",
-                "content": json.dumps(user_message)
-            })
-            
-    return conversation
+        messages.append({
+            "role": "user",
+            "content": json.dumps(user_message)
+        })
+
+        return messages
+
+    def _visible_item(self, scratchpad: List[dict], idx: int, summary: Optional[str]) -> Optional[dict]:
+        # entries folded into the summary are skipped, the summary is sent along with the task
+        if idx == 0:
+            return {**scratchpad[0], "summary": summary} if summary else scratchpad[0]
+
+        return scratchpad[idx] if idx >= self._summarized_until else None
+
+    def render(self, scratchpad: List[dict], summary: Optional[str]=None, summarized_until: int=0, fit: bool=True) -> List[dict]:
+        # a different or shrunk scratchpad, or a new summary, invalidates the cache
+        if scratchpad is not self._scratchpad or len(scratchpad) - 1 < self._n_frozen or summarized_until != self._summarized_until:
+            self._scratchpad = scratchpad
+            self._summarized_until = summarized_until
+            self._frozen_messages = []
+            self._n_frozen = 0
+
+        for idx in range(self._n_frozen, len(scratchpad) - 1):
+            item = self._visible_item(scratchpad, idx, summary)
+
+            if item is not None:
+                self._frozen_messages.extend(self._render_item(item, False))
+
+        self._n_frozen = max(self._n_frozen, len(scratchpad) - 1)
+        conversation = [self._system_message, *self._frozen_messages]
+
+        if len(scratchpad) > 0:
+            conversation.extend(self._render_item(self._visible_item(scratchpad, len(scratchpad) - 1, summary) or scratchpad[-1], True))
+
+        if fit and self.context_budget is not None:
+            return self.context_budget.fit(conversation)
+
+        return conversation
+
+def is_step_complete(item: dict) -> bool:
+    if 'actions' in item:
+        return 'observations' in item
+
+    return all(k in item for k in ['action', 'action_input', 'observation'])
+
+def parse_actions(actions) -> Optional[List[Tuple[str, str]]]:
+    if not isinstance(actions, list) or len(actions) == 0:
+        return None
+
+    calls = []
+
+    for e in actions:
+        if not isinstance(e, dict) or 'action' not in e or 'action_input' not in e:
+            return None
+
+        calls.append((str(e['action']), str(e['action_input'])))
+
+    return calls
+
+def get_system_reminder(log: DAgentLog) -> Optional[str]:
+    if isinstance(log, NonInteractiveDAgentLog):
+        return log.mission.system_reminder or "Please follow the instructions carefully"
+
+    return None
+
+def render_conversation(log: DAgentLog, tool: ToolsetComposer, base_system_prompt: str=""):
+    system_prompt = format_prompt_v2(base_system_prompt, tool)
+    return ReactConversationBuilder(system_prompt, get_system_reminder(log)).render(log.scratchpad)
 
 def parse_conversational_react_response(response: str) -> dict:
-    try:
-        json_response = json.loads(response)
-    except json.JSONDecodeError:
+    json_response = extract_json_object(response)
+
+    if json_response is None:
         return {}
 
     segment_pad = {}
@@ -108,6 +204,13 @@ def parse_conversational_react_response(response: str) -> dict:
 
         return segment_pad
 
+    if "actions" in json_response:
+        segment_pad.update({
+            "actions": json_response["actions"]
+        })
+
+        return segment_pad
+
     if "action" in json_response:
         segment_pad.update({
             "action": json_response["action"]
@@ -123,6 +226,41 @@ def parse_conversational_react_response(response: str) -> dict:
 
     return segment_pad
 
+def with_observation_toolset(toolsets_cfg: List[ClassRegistration], max_observation_chars: int) -> List[ClassRegistration]:
+    # truncated observations are only useful if the agent can page through them
+    if max_observation_chars <= 0 or any(e.name == ObservationToolset.__name__ for e in toolsets_cfg):
+        return toolsets_cfg
+
+    return [*toolsets_cfg, ClassRegistration(name=ObservationToolset.__name__)]
+
+SUMMARY_SYSTEM_PROMPT = '''You compress the scratchpad of an agent working on a task.
+You are given the current summary (may be empty) and the next steps, each with a thought, the actions taken and their observations.
+Reply with the updated summary only: a concise plain-text account of what was done, the facts learned (ids, usernames, numbers, urls) and what remains open.
+Drop chit-chat, repeated information and raw data which is no longer needed.'''
+
+def summarize_steps(llm: AsyncChatCompletion, summary: Optional[str], steps: List[dict], max_tokens: int=C.SUMMARY_MAX_TOKENS) -> InferenceResult:
+    """Requests the fold of `steps` into `summary`, the receipt resolves with the new summary"""
+    messages = [
+        {
+            "role": "system",
+            "content": SUMMARY_SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": json.dumps({"summary": summary or "", "steps": steps})
+        }
+    ]
+
+    return llm(messages, override_kwargs={"max_tokens": max_tokens})
+
+def summary_of(result: Optional[InferenceResult]) -> Optional[str]:
+    """The summary of a finished summarize_steps receipt, None if it failed"""
+    if result is None or result.state != InferenceState.DONE or not result.result:
+        logger.warning("Failed to summarize the scratchpad: {}".format(result.error if result is not None else "no result"))
+        return None
+
+    return result.result.strip()
+
 def build_llm(cfg: ClassRegistration):
     _cls = get_cls(RegistryCategory.LLM, cfg.name)
 
@@ -152,28 +290,147 @@ def build_toolset(cfg: List[ClassRegistration]) -> ToolsetComposer:
 class ReactReasoningDAgent(NonInteractiveDAgentBase):
     SCRATCHPAD_LENGTH_LIMIT = 30
 
-    def __init__(self, log: NonInteractiveDAgentLog, verbose=True, *args, **kwargs) -> None:
+    def __init__(self, log: NonInteractiveDAgentLog, verbose=True, cache_friendly_prompt=False, parallel_actions=False, max_parallel_actions=C.DEFAULT_MAX_PARALLEL_ACTIONS, max_observation_chars=C.OBSERVATION_MAX_CHARS, context_window=None, summarize_after_tokens=0, summary_keep_steps=C.SUMMARY_KEEP_STEPS, summary_llm_cfg: Optional[dict]=None, *args, **kwargs) -> None:
         super().__init__(log)
 
         character_builder_cfg = log.character_builder_cfg
         llm_cfg = log.llm_cfg
-        toolsets_cfg = log.toolset_cfg
+        toolsets_cfg = with_observation_toolset(log.toolset_cfg, max_observation_chars)
         self.verbose = verbose
+        self.max_parallel_actions = max_parallel_actions if parallel_actions else 1
+        self.max_observation_chars = max_observation_chars
+
+        assert summary_keep_steps > 0, "summary_keep_steps must be positive"
+
+        # older steps are folded into a rolling summary once the conversation exceeds this, disabled when 0
+        self.summarize_after_tokens = summarize_after_tokens
+        self.summary_keep_steps = summary_keep_steps
+
+        self.llm: AsyncChatCompletion = build_component(RegistryCategory.LLM, llm_cfg)
+        self.summary_llm: AsyncChatCompletion = (
+            build_component(RegistryCategory.LLM, ClassRegistration(**summary_llm_cfg))
+            if summary_llm_cfg is not None else self.llm
+        )
+        self.character_builder = build_component(RegistryCategory.CharacterBuilder, character_builder_cfg)
+        self.toolsets = ToolsetComposer(build_components(RegistryCategory.ToolSet, toolsets_cfg))
+
+        self.base_system_prompt = compile_system_prompt(self.character_builder, character_builder_cfg, log.characteristic)
+        self.system_prompt = compile_react_system_prompt(
+            self.base_system_prompt, self.toolsets, toolsets_cfg,
+            cacheable=getattr(self.character_builder, "cacheable", True),
+            max_parallel_actions=self.max_parallel_actions
+        )
+        self.conversation = ReactConversationBuilder(
+            self.system_prompt, get_system_reminder(log),
+            reminder_at_tail=cache_friendly_prompt,
+            # system prompt and task are always kept
+            context_budget=ContextBudget.for_llm(self.llm, context_window, keep_head=2)
+        )
+
+        # tool calls run on the shared tool executor, the agent resumes once they are done
+        self._pending_tool: Optional[Future] = None
+
+        # receipt of the summary being computed and the scratchpad index it summarizes until
+        self._summary_receipt: Optional[str] = None
+        self._summary_until = 0
+
+    def notify_when_ready(self, callback: Callable[[], None]) -> bool:
+        if self._pending_tool is not None and not self._pending_tool.done():
+            self._pending_tool.add_done_callback(lambda _: callback())
+            return True
+
+        if self._summary_receipt is not None:
+            return InferenceResultStore().add_done_callback(self._summary_receipt, callback)
+
+        return super().notify_when_ready(callback)
+
+    def _render(self, log: NonInteractiveDAgentLog) -> List[dict]:
+        return self.conversation.render(log.scratchpad, log.summary, log.summarized_until)
+
+    def _fold_range(self, log: NonInteractiveDAgentLog) -> Optional[Tuple[int, int]]:
+        if self.summarize_after_tokens <= 0:
+            return None
+
+        start = max(1, log.summarized_until)
+        end = len(log.scratchpad) - self.summary_keep_steps
+
+        if end - start < self.summary_keep_steps:
+            return None
+
+        # the whole conversation is counted, the budget-fitted one never exceeds the budget
+        conversation = self.conversation.render(log.scratchpad, log.summary, log.summarized_until, fit=False)
+
+        # fold at least `summary_keep_steps` entries at once, so that there is one summary call every few steps
+        if self.conversation.context_budget.count(conversation) <= self.summarize_after_tokens:
+            return None
+
+        return start, end
+
+    def _submit_summary(self, log: NonInteractiveDAgentLog, start: int, end: int):
+        # a normal receipt, the agent is parked until it is done instead of a thread waiting for it
+        try:
+            receipt = summarize_steps(self.summary_llm, log.summary, log.scratchpad[start:end])
+        except Exception as err:
+            logger.error(f"Failed to summarize the scratchpad: {err}")
+            return False
+
+        self._summary_receipt, self._summary_until = receipt.id, end
+        return True
+
+    def _awaiting_observation(self, item: dict) -> bool:
+        if 'actions' in item:
+            return 'observations' not in item
+
+        return 'action' in item and 'action_input' in item and 'observation' not in item
+
+    def _submit_tool(self, item: dict, resumed: bool=False):
+        # after a restart the call may have been done already, only idempotent tools are run again
+        submit = self.toolsets.resubmit if resumed else self.toolsets.submit
+        submit_many = self.toolsets.resubmit_many if resumed else self.toolsets.submit_many
+
+        if 'actions' in item:
+            calls = [(e['action'], e['action_input']) for e in item['actions'][:self.max_parallel_actions]]
+            self._pending_tool = submit_many(calls)
+        else:
+            self._pending_tool = submit(item['action'], item['action_input'])
+
+    def _record_observation(self, item: dict, result):
+        if 'actions' in item:
+            observations = [budget_observation(str(e), self.max_observation_chars) for e in result]
+            observations.extend(
+                f"Skipped, at most {self.max_parallel_actions} actions are allowed at once"
+                for _ in item['actions'][len(observations):]
+            )
+
+            for observation in observations:
+                self.verbose and logger.info(f"🔍 Observation: {observation}")
+
+            item['observations'] = observations
+        else:
+            item['observation'] = budget_observation(str(result), self.max_observation_chars)
+            self.verbose and logger.info(f"🔍 Observation: {item['observation']}")
+
+    def _infer_next(self, log: NonInteractiveDAgentLog) -> NonInteractiveDAgentLog:
+        if len(log.scratchpad) > self.SCRATCHPAD_LENGTH_LIMIT:
+            data = log.clone()
+            data.update(
+                state=ChainState.ERROR,
+                system_message="Scratchpad length exceeded"
+            )
 
-        self.llm: AsyncChatCompletion = get_cls(
-            RegistryCategory.LLM, llm_cfg.name
-        )(**llm_cfg.init_params)
+            self.verbose and logger.error("Scratchpad length exceeded, stop here!")
+            return NonInteractiveDAgentLog(**data)
 
-        self.character_builder = get_cls(
-            RegistryCategory.CharacterBuilder, character_builder_cfg.name
-        )(**character_builder_cfg.init_params)
+        fold = self._fold_range(log)
 
-        self.toolsets = ToolsetComposer([
-            get_cls(RegistryCategory.ToolSet, e.name)(**e.init_params)
-            for e in toolsets_cfg
-        ])
+        if fold is not None and self._submit_summary(log, *fold):
+            # the inference is requested once the summary is ready
+            log.infer_receipt = None
+            return log
 
-        self.base_system_prompt = self.character_builder(log.characteristic)
+        receipt = self.llm(self._render(log), early_stop=JSONObjectStreamParser)
+        log.infer_receipt = receipt.id
+        return log
 
     def __call__(self) -> NonInteractiveDAgentLog:
         log = self.log
@@ -181,8 +438,7 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
         if log.state == ChainState.NEW:
             log.state = ChainState.RUNNING
 
-            system_prompt = format_prompt_v2(self.base_system_prompt, self.toolsets)
-            logger.info("🤖 System: " + system_prompt)
+            logger.info("🤖 System: " + self.system_prompt)
             logger.info("👨‍💻 Task: " + log.mission.task)
             logger.info("🔔 Reminder: " + log.mission.system_reminder)
 
@@ -191,13 +447,54 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
                     "task": log.mission.task.replace('\n', ' ').strip(),
                 }
             ]
-            receipt = self.llm(render_conversation(log, self.toolsets))
+            receipt = self.llm(self._render(log), early_stop=JSONObjectStreamParser)
             logger.info("Inference receipt: " + receipt.id)
             log.infer_receipt = receipt.id
             return log
 
         elif log.state == ChainState.RUNNING:
+            if self._summary_receipt is not None:
+                result = self.summary_llm.get(self._summary_receipt)
+
+                if result is not None and result.state == InferenceState.EXECUTING:
+                    return log
+
+                summary = summary_of(result)
+                self._summary_receipt = None
+
+                if summary is not None:
+                    self.verbose and logger.info("📝 Summary: " + summary)
+                    log.summary, log.summarized_until = summary, self._summary_until
+
+                receipt = self.llm(self._render(log), early_stop=JSONObjectStreamParser)
+                log.infer_receipt = receipt.id
+                return log
+
+            if log.infer_receipt is None and self._pending_tool is None and not self._awaiting_observation(log.scratchpad[-1]):
+                # resumed from a checkpoint taken while summarizing
+                return self._infer_next(log)
+
+            if self._pending_tool is None and self._awaiting_observation(log.scratchpad[-1]):
+                # resumed from a checkpoint taken while the tool was running
+                self._submit_tool(log.scratchpad[-1], resumed=True)
+
+            if self._pending_tool is not None:
+                if not self._pending_tool.done():
+                    return log
+
+                self._record_observation(log.scratchpad[-1], self._pending_tool.result())
+                self._pending_tool = None
+                return self._infer_next(log)
+
             result = self.llm.get(log.infer_receipt)
+
+            if result is None:
+                # the receipt is gone (e.g. expired or lost in a restart), infer again
+                logger.warning("Inference receipt {} not found, retrying".format(log.infer_receipt))
+                receipt = self.llm(self._render(log), early_stop=JSONObjectStreamParser)
+                log.infer_receipt = receipt.id
+                return log
+
             if result.state == InferenceState.EXECUTING:
                 return log
 
@@ -223,13 +520,11 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
                 return NonInteractiveDAgentLog(**data)
 
             if 'thought' in pad:
-                if 'thought' in log.scratchpad[-1] and any(
-                    k not in log.scratchpad[-1]
-                    for k in ['action', 'action_input', 'observation']
-                ):
-                    for kk in ['action', 'action_input', 'observation']:
-                        if kk not in log.scratchpad[-1]:
-                            log.scratchpad[-1][kk] = "Not found!"
+                if 'thought' in log.scratchpad[-1] and not is_step_complete(log.scratchpad[-1]):
+                    if 'actions' not in log.scratchpad[-1]:
+                        for kk in ['action', 'action_input', 'observation']:
+                            if kk not in log.scratchpad[-1]:
+                                log.scratchpad[-1][kk] = "Not found!"
 
                     data = log.clone()
                     data.update(
@@ -247,7 +542,35 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
 
                     self.verbose and logger.info("🤔 Thought: " + pad['thought'])
 
-            if 'action' in pad:
+            if 'actions' in pad:
+                calls = parse_actions(pad['actions'])
+
+                if calls is None:
+                    log.scratchpad[-1]['actions'] = pad['actions']
+                    log.scratchpad[-1]['observations'] = []
+
+                    data = log.clone()
+                    data.update(
+                        state=ChainState.ERROR,
+                        system_message="Invalid actions, expected a list of action and action_input"
+                    )
+
+                    self.verbose and logger.error("Invalid actions: {}".format(pad['actions']))
+                    return NonInteractiveDAgentLog(**data)
+
+                for action, action_input in calls[:self.max_parallel_actions]:
+                    self.verbose and logger.info("🛠️ Action: " + action)
+                    self.verbose and logger.info("🔧 Action input: " + action_input)
+
+                log.scratchpad[-1]['actions'] = [
+                    {"action": action, "action_input": action_input}
+                    for action, action_input in calls
+                ]
+
+                self._submit_tool(log.scratchpad[-1])
+                return log
+
+            elif 'action' in pad:
                 if 'action_input' not in pad:
                     log.scratchpad[-1]['action'] = pad['action']
                     log.scratchpad[-1]['action_input'] = "Not found!"
@@ -277,15 +600,14 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
                 self.verbose and logger.info("🛠️ Action: " + action)
                 self.verbose and logger.info("🔧 Action input: " + action_input)
 
-                observation = str(self.toolsets.execute(action, action_input))
-
-                self.verbose and logger.info(f"🔍 Observation: {observation}")
-
                 log.scratchpad[-1]['action'] = action
                 log.scratchpad[-1]['action_input'] = action_input
-                log.scratchpad[-1]['observation'] = observation
+
+                self._submit_tool(log.scratchpad[-1])
+                return log
+
             if 'final_answer' in pad:
-                if any(k in log.scratchpad[-1] for k in ['action', 'action_input', 'observation']):
+                if any(k in log.scratchpad[-1] for k in ['action', 'action_input', 'observation', 'actions', 'observations']):
                     log.scratchpad.append({})
 
                 log.scratchpad[-1].update({
@@ -298,19 +620,7 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
 
                 return log
 
-            if len(log.scratchpad) > self.SCRATCHPAD_LENGTH_LIMIT:
-                data = log.clone()
-                data.update(
-                    state=ChainState.ERROR,
-                    system_message="Scratchpad length exceeded"
-                )
-
-                self.verbose and logger.error("Scratchpad length exceeded, stop here!")
-                return NonInteractiveDAgentLog(**data)
-
-            receipt = self.llm(render_conversation(log, self.toolsets))
-            log.infer_receipt = receipt.id
-            return log
+            return self._infer_next(log)
 
         else:
             data = log.clone()
@@ -325,37 +635,36 @@ class ReactReasoningDAgent(NonInteractiveDAgentBase):
 class ReactChatDAgent(InteractiveDAgentBase):
     SCRATCHPAD_LENGTH_LIMIT = 30
 
-    def __init__(self, log: NonInteractiveDAgentLog, verbose=True, *args, **kwargs) -> None:
+    def __init__(self, log: NonInteractiveDAgentLog, verbose=True, max_observation_chars=C.OBSERVATION_MAX_CHARS, context_window=None, *args, **kwargs) -> None:
         super().__init__(log)
 
         character_builder_cfg = log.character_builder_cfg
         llm_cfg = log.llm_cfg
-        toolsets_cfg = log.toolset_cfg
+        toolsets_cfg = with_observation_toolset(log.toolset_cfg, max_observation_chars)
         
         self.verbose = verbose
-
-        self.llm: AsyncChatCompletion = get_cls(
-            RegistryCategory.LLM, llm_cfg.name
-        )(**llm_cfg.init_params)
-
-        self.character_builder = get_cls(
-            RegistryCategory.CharacterBuilder, character_builder_cfg.name
-        )(**character_builder_cfg.init_params)
-
-        self.toolsets = ToolsetComposer([
-            get_cls(RegistryCategory.ToolSet, e.name)(**e.init_params)
-            for e in toolsets_cfg
-        ])
-
-        self.base_system_prompt = self.character_builder(log.characteristic)
+        self.max_observation_chars = max_observation_chars
+
+        self.llm: AsyncChatCompletion = build_component(RegistryCategory.LLM, llm_cfg)
+        self.character_builder = build_component(RegistryCategory.CharacterBuilder, character_builder_cfg)
+        self.toolsets = ToolsetComposer(build_components(RegistryCategory.ToolSet, toolsets_cfg))
+
+        self.base_system_prompt = compile_system_prompt(self.character_builder, character_builder_cfg, log.characteristic)
+        self.system_prompt = compile_react_system_prompt(
+            self.base_system_prompt, self.toolsets, toolsets_cfg,
+            cacheable=getattr(self.character_builder, "cacheable", True)
+        )
+        self.conversation = ReactConversationBuilder(
+            self.system_prompt, get_system_reminder(log),
+            context_budget=ContextBudget.for_llm(self.llm, context_window, keep_head=2)
+        )
 
     def _react_step(self, log: DAgentLog, mission: Mission) -> DAgentLog:
 
         if log.state == ChainState.NEW:
             log.state = ChainState.RUNNING
 
-            system_prompt = format_prompt_v2(self.base_system_prompt, self.toolsets)
-            logger.info("🤖 System: " + system_prompt)
+            logger.info("🤖 System: " + self.system_prompt)
             logger.info("👨‍💻 Task: " + mission.task)
             logger.info("🔔 Reminder: " + mission.system_reminder)
 
@@ -364,13 +673,21 @@ class ReactChatDAgent(InteractiveDAgentBase):
                     "task": mission.task.replace('\n', ' ').strip(),
                 }
             ]
-            receipt = self.llm(render_conversation(log, self.toolsets))
+            receipt = self.llm(self.conversation.render(log.scratchpad), early_stop=JSONObjectStreamParser)
             logger.info("Inference receipt: " + receipt.id)
             log.infer_receipt = receipt.id
             return log
 
         elif log.state == ChainState.RUNNING:
             result = self.llm.get(log.infer_receipt)
+
+            if result is None:
+                # the receipt is gone (e.g. expired or lost in a restart), infer again
+                logger.warning("Inference receipt {} not found, retrying".format(log.infer_receipt))
+                receipt = self.llm(self.conversation.render(log.scratchpad), early_stop=JSONObjectStreamParser)
+                log.infer_receipt = receipt.id
+                return log
+
             if result.state == InferenceState.EXECUTING:
                 return log
 
@@ -449,7 +766,10 @@ class ReactChatDAgent(InteractiveDAgentBase):
                 self.verbose and print("🛠️ Action: " + action)
                 self.verbose and print("🔧 Action input: " + action_input)
 
-                observation = str(self.toolsets.execute(action, action_input))
+                observation = budget_observation(
+                    str(self.toolsets.submit(action, action_input).result()),
+                    self.max_observation_chars
+                )
 
                 self.verbose and print(f"🔍 Observation: {observation}")
 
@@ -480,7 +800,7 @@ class ReactChatDAgent(InteractiveDAgentBase):
                 self.verbose and logger.error("Scratchpad length exceeded, stop here!")
                 return DAgentLog(**data)
 
-            receipt = self.llm(render_conversation(log, self.toolsets))
+            receipt = self.llm(self.conversation.render(log.scratchpad), early_stop=JSONObjectStreamParser)
             log.infer_receipt = receipt.id
             return log
 
@@ -500,7 +820,7 @@ class ReactChatDAgent(InteractiveDAgentBase):
         chat_history = [
             {
                 "role": "system",
-                "content": format_prompt_v2(self.base_system_prompt, self.toolsets)
+                "content": self.system_prompt
             },
             {
                 "role": "user",
@@ -509,6 +829,9 @@ class ReactChatDAgent(InteractiveDAgentBase):
         ]
 
         while log.state not in [ChainState.DONE, ChainState.ERROR]:
+            if log.infer_receipt is not None:
+                self.llm.wait(log.infer_receipt)
+
             log = self._react_step(log, mission)
 
         verbose_response = ''
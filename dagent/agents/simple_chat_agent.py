@@ -1,12 +1,17 @@
 from dagent.models import Mission
+from typing import Iterator
 from .base_agent import InteractiveDAgentBase, DAgentLog
-from dagent.registry import register_decorator, get_cls, RegistryCategory
+from dagent.registry import register_decorator, RegistryCategory
 from dagent.llm import AsyncChatCompletion
 from dagent.tools import ToolsetComposer
+from dagent.component_pool import build_component, build_components
+from dagent.prompt_cache import compile_system_prompt
+from dagent.context_budget import ContextBudget
+from dagent import constant as C
 
 @register_decorator(RegistryCategory.InteractiveDAgent)
 class SimpleChatDAgent(InteractiveDAgentBase):
-    def __init__(self, log: DAgentLog, max_conversation_length=30, *args, **kwargs) -> None:
+    def __init__(self, log: DAgentLog, max_conversation_length=30, context_window=None, *args, **kwargs) -> None:
         super().__init__(log)
         self.max_conversation_length = max_conversation_length + (1 - max_conversation_length % 2)
         
@@ -14,20 +19,12 @@ class SimpleChatDAgent(InteractiveDAgentBase):
         llm_cfg = log.llm_cfg 
         toolsets_cfg = log.toolset_cfg
 
-        self.llm: AsyncChatCompletion = get_cls(
-            RegistryCategory.LLM, llm_cfg.name
-        )(**llm_cfg.init_params)
-
-        self.character_builder = get_cls(
-            RegistryCategory.CharacterBuilder, character_builder_cfg.name
-        )(**character_builder_cfg.init_params)
-
-        self.toolsets = ToolsetComposer([
-            get_cls(RegistryCategory.ToolSet, e.name)(**e.init_params) 
-            for e in toolsets_cfg
-        ])
+        self.llm: AsyncChatCompletion = build_component(RegistryCategory.LLM, llm_cfg)
+        self.character_builder = build_component(RegistryCategory.CharacterBuilder, character_builder_cfg)
+        self.toolsets = ToolsetComposer(build_components(RegistryCategory.ToolSet, toolsets_cfg))
+        self.context_budget = ContextBudget.for_llm(self.llm, context_window, keep_head=1)
         
-        self.base_system_prompt = self.character_builder(log.characteristic)
+        self.base_system_prompt = compile_system_prompt(self.character_builder, character_builder_cfg, log.characteristic)
         self.log.scratchpad.append({
             'role': 'system',
             'content': self.base_system_prompt
@@ -40,8 +37,12 @@ class SimpleChatDAgent(InteractiveDAgentBase):
         for message in self.log.scratchpad:
             if message['role'] not in ignore_role:
                 chat_history.append(message)
+
+        # the system prompt and the last `max_conversation_length` messages (odd, so starting with a user message)
+        if len(chat_history) > self.max_conversation_length + 1:
+            chat_history = chat_history[:1] + chat_history[-self.max_conversation_length:]
                 
-        return chat_history
+        return self.context_budget.fit(chat_history)
 
     def __call__(self, mission: Mission) -> DAgentLog:
         self.log.scratchpad.append({
@@ -49,8 +50,8 @@ class SimpleChatDAgent(InteractiveDAgentBase):
             'content': mission.task
         })
 
-        receipt = self.llm(self.log.scratchpad)
-        resp = self.llm.get(receipt.id)
+        receipt = self.llm(self.render_conversation())
+        resp = self.llm.wait(receipt.id)
 
         if resp.result is not None:
             self.log.scratchpad.append({
@@ -63,4 +64,29 @@ class SimpleChatDAgent(InteractiveDAgentBase):
             raise Exception('No response from LLM, please check the LLM service and try again.')
 
         return self.log
-        
\ No newline at end of file
+
+    def stream(self, mission: Mission) -> Iterator[str]:
+        self.log.scratchpad.append({
+            'role': 'user',
+            'content': mission.task
+        })
+
+        receipt_id = self.llm.generate_uuid()
+
+        for delta in self.llm.stream(self.render_conversation(), receipt_id=receipt_id):
+            yield delta
+
+        # the stream is over, the result is committed right after; do not hang if it never is
+        resp = self.llm.wait(receipt_id, timeout=C.LLM_REQUEST_TIMEOUT)
+
+        if resp is not None and resp.result is not None:
+            self.log.scratchpad.append({
+                'role': 'assistant',
+                'content': resp.result,
+                'onchain_data': resp.onchain_data.model_dump() if resp.onchain_data else None
+            })
+        else:
+            self.log.scratchpad.pop()
+            raise Exception('No response from LLM, please check the LLM service and try again.')
+
+        self._build_response(self.log)
@@ -3,6 +3,11 @@ from dagent.models import Characteristic
 
 # this class is simply a system prompt builder
 class CharacterBuilderBase(object):
+    # whether the same characteristic always yields the same prompt, see dagent.prompt_cache
+    cacheable = True
+    # stateless builders set it to be shared by all agents (see dagent.component_pool)
+    SHAREABLE = False
+
     def __init__(self, *args, **kwargs) -> None:
         pass
 
@@ -5,6 +5,8 @@ from dagent import constant as C
 
 @register_decorator(RegistryCategory.CharacterBuilder)
 class SimpleCharacterBuilder(CharacterBuilderBase):
+    SHAREABLE = True
+
     def __call__(self, characteristic: Characteristic) -> str:
         if characteristic.system_prompt is not None:
             return characteristic.system_prompt
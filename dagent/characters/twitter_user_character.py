@@ -2,18 +2,52 @@ from typing import Any
 from .character_base import CharacterBuilderBase, Characteristic
 from dagent.registry import register_decorator, RegistryCategory
 from dagent import constant as C
+from dagent.prompt_cache import PromptCache, prompt_key, characteristic_hash
+from typing import Optional
 import random
 
 @register_decorator(RegistryCategory.CharacterBuilder)
 class TwitterUserCharacterBuilder(CharacterBuilderBase):
-    def __init__(self, shuffle_everything=True, *args, **kwargs) -> None:
+    SHAREABLE = True
+
+    def __init__(self, shuffle_everything=True, cache_friendly=False, num_variants=C.DEFAULT_PROMPT_VARIANTS, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.shuffle_everything = shuffle_everything
-        
+
+        # in cache friendly mode, the variety comes from a small pool of byte-stable prompts
+        # instead of a fresh shuffle per mission, so the inference backend can reuse their prefix
+        self.cache_friendly = cache_friendly
+        self.num_variants = num_variants
+
+        assert num_variants > 0, "num_variants must be positive"
+
+    @property
+    def cacheable(self) -> bool:
+        return not self.shuffle_everything
+
+    def _shuffled(self, data: list, rng: Optional[random.Random]) -> list:
+        # never shuffle the characteristic in place
+        return rng.sample(data, len(data)) if rng is not None else data
+
     def __call__(self, characteristic: Characteristic) -> str:
         if characteristic.system_prompt is not None:
             return characteristic.system_prompt
 
+        if not self.shuffle_everything:
+            return self._build(characteristic, None)
+
+        if not self.cache_friendly:
+            return self._build(characteristic, random)
+
+        variant = random.randrange(self.num_variants)
+        seed = "{}:{}".format(characteristic_hash(characteristic), variant)
+
+        return PromptCache().get_or_compile(
+            prompt_key("twitter-user-variant", seed),
+            lambda: self._build(characteristic, random.Random(seed))
+        )
+
+    def _build(self, characteristic: Characteristic, rng: Optional[random.Random]) -> str:
         characteristic_representation_template = '''
 You are {agent_name}, a highly intelligent agent, capable of executing any task assigned to you.
 
@@ -38,12 +72,9 @@ Again, your name is {agent_name}, and your twitter account is @{twitter_username
         agent_name = agent_personal_info.get("agent_name", twitter_username)
         
         bio_data, lore_data, knowledge_data = \
-            characteristic.bio, characteristic.lore, characteristic.knowledge
-            
-        if self.shuffle_everything:
-            random.shuffle(bio_data)
-            random.shuffle(lore_data)
-            random.shuffle(knowledge_data)
+            self._shuffled(characteristic.bio, rng), \
+            self._shuffled(characteristic.lore, rng), \
+            self._shuffled(characteristic.knowledge, rng)
             
         bio_repr = "# Bio" if len(bio_data) > 0 else ""
         lore_repr = "# Lore" if len(lore_data) > 0 else ""
@@ -58,20 +89,14 @@ Again, your name is {agent_name}, and your twitter account is @{twitter_username
         for knowledge in knowledge_data[:C.DEFAULT_KNOWLEDGE_MAX_LENGTH]:
             knowledge_repr += f"\n- {knowledge}"
             
-        example_posts_data = characteristic.example_posts
-
-        if self.shuffle_everything:
-            random.shuffle(example_posts_data)
+        example_posts_data = self._shuffled(characteristic.example_posts, rng)
 
         example_posts_repr = "# Example Posts" if len(example_posts_data) > 0 else ""
         
         for post in example_posts_data[:C.DEFAULT_EXAMPLE_POSTS_MAX_LENGTH]:
             example_posts_repr += f"\n- {post}"
             
-        interested_topics_data = characteristic.interested_topics 
-
-        if self.shuffle_everything:
-            random.shuffle(interested_topics_data)
+        interested_topics_data = self._shuffled(characteristic.interested_topics, rng)
 
         interested_topics_repr = "# Interested Topics" if len(interested_topics_data) > 0 else ""
         
@@ -0,0 +1,62 @@
+from singleton_decorator import singleton
+from .registry import get_cls, RegistryCategory
+from .models import ClassRegistration
+from typing import Any, Dict, List, Tuple
+import threading
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+@singleton
+class ComponentPool(object):
+    """Instances of llms, toolsets and character builders shared across agents.
+    Only classes declaring `SHAREABLE = True` (stateless or thread-safe) are pooled, others are built per call"""
+
+    def __init__(self) -> None:
+        self._components: Dict[Tuple[str, str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(category: RegistryCategory, cfg: ClassRegistration) -> Tuple[str, str, str]:
+        return (
+            category.value,
+            cfg.name,
+            json.dumps(cfg.init_params, sort_keys=True, default=str)
+        )
+
+    def get(self, category: RegistryCategory, cfg: ClassRegistration) -> Any:
+        _cls = get_cls(category, cfg.name)
+
+        if _cls is None:
+            raise ValueError(f"{category.value} class {cfg.name} not found")
+
+        if not getattr(_cls, "SHAREABLE", False):
+            return _cls(**cfg.init_params)
+
+        key = self._key(category, cfg)
+
+        with self._lock:
+            component = self._components.get(key)
+
+            if component is None:
+                logger.info(f"Building shared {category.value} {cfg.name}")
+                component = self._components[key] = _cls(**cfg.init_params)
+
+        return component
+
+    def clear(self):
+        with self._lock:
+            self._components.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "components": len(self._components)
+            }
+
+def build_component(category: RegistryCategory, cfg: ClassRegistration) -> Any:
+    return ComponentPool().get(category, cfg)
+
+def build_components(category: RegistryCategory, cfg: List[ClassRegistration]) -> List[Any]:
+    return [build_component(category, e) for e in cfg]
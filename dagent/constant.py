@@ -21,11 +21,99 @@ ETERNALAI_API_KEY = get_env_and_warning("ETERNALAI_API_KEY")
 ETERNAL_CHAIN_ID = os.getenv("ETERNAL_CHAIN_ID", "45762")
 ETERNAL_MODEL_NAME = os.getenv("ETERNAL_MODEL_NAME", "unsloth/Llama-3.3-70B-Instruct-bnb-4bit")
 
+# shared client of ETERNAL_X_API
+X_API_TIMEOUT = float(os.getenv("X_API_TIMEOUT", "30"))
+X_API_CONNECT_TIMEOUT = float(os.getenv("X_API_CONNECT_TIMEOUT", "5"))
+X_API_MAX_RETRIES = int(os.getenv("X_API_MAX_RETRIES", "3"))
+X_API_BACKOFF_BASE = float(os.getenv("X_API_BACKOFF_BASE", "0.5"))
+X_API_MAX_BACKOFF = float(os.getenv("X_API_MAX_BACKOFF", "30"))
+X_API_POOL_SIZE = int(os.getenv("X_API_POOL_SIZE", "32"))
+X_API_LOOKUP_CONCURRENCY = int(os.getenv("X_API_LOOKUP_CONCURRENCY", "8"))
+X_API_MAX_IDS_PER_REQUEST = 100
+TWITTER_USERNAME_CACHE_SIZE = int(os.getenv("TWITTER_USERNAME_CACHE_SIZE", "4096"))
+MAX_THREAD_DEPTH = 20
+TWITTER_TOOL_CACHE_TTL = float(os.getenv("TWITTER_TOOL_CACHE_TTL", "300"))
+
+# since_id cursors of incremental mention polling (sqlite), kept in memory when empty
+TWITTER_CURSOR_PATH = os.getenv("TWITTER_CURSOR_PATH", "")
+TWITTER_CURSOR_RETENTION = float(os.getenv("TWITTER_CURSOR_RETENTION", str(7 * 24 * 60 * 60)))
+# a returned mention which is not replied to within the lease is returned again, at most MAX_ATTEMPTS times
+TWITTER_MENTION_LEASE = float(os.getenv("TWITTER_MENTION_LEASE", str(60 * 60)))
+TWITTER_MENTION_MAX_ATTEMPTS = int(os.getenv("TWITTER_MENTION_MAX_ATTEMPTS", "3"))
+
+# crawler of the urls in tweets, its cache (sqlite) is kept in memory when CRAWLER_CACHE_PATH is empty
+CRAWLER_CACHE_PATH = os.getenv("CRAWLER_CACHE_PATH", "")
+CRAWLER_CACHE_TTL = float(os.getenv("CRAWLER_CACHE_TTL", str(60 * 60)))
+CRAWLER_CACHE_RETENTION = float(os.getenv("CRAWLER_CACHE_RETENTION", str(7 * 24 * 60 * 60)))
+CRAWLER_CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "8"))
+CRAWLER_PER_HOST_LIMIT = int(os.getenv("CRAWLER_PER_HOST_LIMIT", "2"))
+CRAWLER_CONNECT_TIMEOUT = float(os.getenv("CRAWLER_CONNECT_TIMEOUT", "5"))
+CRAWLER_READ_TIMEOUT = float(os.getenv("CRAWLER_READ_TIMEOUT", "10"))
+CRAWLER_MAX_BYTES = int(os.getenv("CRAWLER_MAX_BYTES", str(2 * 1024 * 1024)))
+CRAWLER_MAX_TEXT_CHARS = int(os.getenv("CRAWLER_MAX_TEXT_CHARS", "4000"))
+CRAWLER_MAX_URLS = int(os.getenv("CRAWLER_MAX_URLS", "5"))
+
+# wikipedia search tool
+WIKI_CONNECT_TIMEOUT = float(os.getenv("WIKI_CONNECT_TIMEOUT", "5"))
+WIKI_READ_TIMEOUT = float(os.getenv("WIKI_READ_TIMEOUT", "15"))
+
 # for trading, not available in the current version
 CHAIN_ID=None
 CONTRACT_ID=None 
 
+LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", "64"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "180"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+
+# shared connection pool of the asyncio llm backend
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+INFERENCE_STORE_MAX_ITEMS = int(os.getenv("INFERENCE_STORE_MAX_ITEMS", "2048"))
+INFERENCE_STORE_MAX_BYTES = int(os.getenv("INFERENCE_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+INFERENCE_STORE_TTL = float(os.getenv("INFERENCE_STORE_TTL", str(6 * 60 * 60)))
+
+# optional on-disk copy of inference results (sqlite), disabled when empty
+INFERENCE_STORE_PATH = os.getenv("INFERENCE_STORE_PATH", "")
+INFERENCE_STORE_RETENTION = float(os.getenv("INFERENCE_STORE_RETENTION", str(7 * 24 * 60 * 60)))
+
+# optional checkpoints of in-flight missions (sqlite), disabled when empty
+MISSION_CHECKPOINT_PATH = os.getenv("MISSION_CHECKPOINT_PATH", "")
+
+# shared pool running the tool calls of the agents
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "16"))
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("DEFAULT_TOOL_TIMEOUT", "60"))
+
+# worker processes for CPU-heavy post-processing of tool results (html extraction), run inline when 0
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", "2"))
+PROCESS_POOL_MAX_PENDING = int(os.getenv("PROCESS_POOL_MAX_PENDING", "8"))
+PROCESS_POOL_MAX_TASKS_PER_CHILD = int(os.getenv("PROCESS_POOL_MAX_TASKS_PER_CHILD", "100"))
+PROCESS_POOL_WORKER_MAX_MEMORY = int(os.getenv("PROCESS_POOL_WORKER_MAX_MEMORY", str(512 * 1024 * 1024)))
+PROCESS_POOL_TASK_TIMEOUT = float(os.getenv("PROCESS_POOL_TASK_TIMEOUT", "30"))
+
+PROMPT_CACHE_MAX_ITEMS = int(os.getenv("PROMPT_CACHE_MAX_ITEMS", "512"))
+
+# observations longer than OBSERVATION_MAX_CHARS are stored out of band (sqlite, in memory when the path is empty)
+# and replaced in the scratchpad by a preview, the agents page through them with the read_observation tool
+OBSERVATION_MAX_CHARS = int(os.getenv("OBSERVATION_MAX_CHARS", "4000"))
+OBSERVATION_PREVIEW_CHARS = int(os.getenv("OBSERVATION_PREVIEW_CHARS", "1000"))
+OBSERVATION_PAGE_CHARS = int(os.getenv("OBSERVATION_PAGE_CHARS", "3000"))
+OBSERVATION_STORE_PATH = os.getenv("OBSERVATION_STORE_PATH", "")
+OBSERVATION_STORE_RETENTION = float(os.getenv("OBSERVATION_STORE_RETENTION", str(24 * 60 * 60)))
+
+# token budget of the chat requests, the context window can be overridden per llm (init param context_window)
+DEFAULT_CONTEXT_WINDOW = int(os.getenv("DEFAULT_CONTEXT_WINDOW", "32768"))
+CONTEXT_SAFETY_MARGIN = int(os.getenv("CONTEXT_SAFETY_MARGIN", "256"))
+TOKEN_ESTIMATE_BYTES_PER_TOKEN = int(os.getenv("TOKEN_ESTIMATE_BYTES_PER_TOKEN", "3"))
+TOKEN_ESTIMATE_CACHE_SIZE = int(os.getenv("TOKEN_ESTIMATE_CACHE_SIZE", "8192"))
+
+# rolling summary of old ReAct steps, see the summarize_after_tokens param of ReactReasoningDAgent
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "512"))
+SUMMARY_KEEP_STEPS = int(os.getenv("SUMMARY_KEEP_STEPS", "4"))
+
 AUTO_SERVICE_SLEEP_TIME = 10
+AUTO_SERVICE_NUM_WORKERS = int(os.getenv("AUTO_SERVICE_NUM_WORKERS", "8"))
 
 DEFAULT_TOP_K = 3
 DEFAULT_BIO_MAX_LENGTH = 20
@@ -33,5 +121,7 @@ DEFAULT_LORE_MAX_LENGTH = 20
 DEFAULT_KNOWLEDGE_MAX_LENGTH = 30
 DEFAULT_EXAMPLE_POSTS_MAX_LENGTH = 15
 DEFAULT_INTERESTED_TOPICS_MAX_LENGTH = 10
+DEFAULT_PROMPT_VARIANTS = 4
+DEFAULT_MAX_PARALLEL_ACTIONS = 5
 
 APP_NAME = "dagent"
\ No newline at end of file
@@ -0,0 +1,79 @@
+from dagent import constant as C
+from typing import List, Optional
+import functools
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# role, separators and the like of the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@functools.lru_cache(maxsize=C.TOKEN_ESTIMATE_CACHE_SIZE)
+def estimate_tokens(text: str) -> int:
+    """Rough, tokenizer-free upper estimate, cached per message content"""
+    return math.ceil(len(text.encode("utf-8")) / C.TOKEN_ESTIMATE_BYTES_PER_TOKEN)
+
+def estimate_message_tokens(message: dict) -> int:
+    content = message.get("content")
+    return MESSAGE_OVERHEAD_TOKENS + (estimate_tokens(content) if isinstance(content, str) else 0)
+
+class ContextBudget(object):
+    """Keeps the prompt of a chat request within the context window of the model, leaving room for the
+    `max_tokens` of the completion. The oldest turns are dropped first, the first `keep_head` messages
+    (system prompt and task) and the last one are always kept, the last one is compacted if needed"""
+
+    def __init__(self, context_window: int, max_tokens: int, keep_head: int=1, turn_size: int=2, safety_margin: int=C.CONTEXT_SAFETY_MARGIN) -> None:
+        assert context_window > max_tokens + safety_margin, "context_window must leave room for max_tokens"
+        assert turn_size > 0, "turn_size must be positive"
+
+        self.budget = context_window - max_tokens - safety_margin
+        self.keep_head = keep_head
+        self.turn_size = turn_size
+
+    @classmethod
+    def for_llm(cls, llm, context_window: Optional[int]=None, **kwargs) -> "ContextBudget":
+        return cls(
+            context_window or getattr(llm, "context_window", C.DEFAULT_CONTEXT_WINDOW),
+            getattr(llm, "max_tokens", 0) or 0,
+            **kwargs
+        )
+
+    def count(self, messages: List[dict]) -> int:
+        return sum(estimate_message_tokens(e) for e in messages)
+
+    def fit(self, messages: List[dict]) -> List[dict]:
+        sizes = [estimate_message_tokens(e) for e in messages]
+        total = sum(sizes)
+
+        if total <= self.budget:
+            return messages
+
+        head = messages[:self.keep_head]
+        body_start = min(self.keep_head, len(messages))
+        body_end = max(body_start, len(messages) - 1)
+
+        # drop whole turns, so that the roles keep alternating
+        start = body_start
+
+        while total > self.budget and start + self.turn_size <= body_end:
+            total -= sum(sizes[start:start + self.turn_size])
+            start += self.turn_size
+
+        fitted = head + messages[start:]
+        logger.info(f"Context budget of {self.budget} tokens exceeded, dropped {start - body_start} messages")
+
+        if total > self.budget and len(fitted) > len(head):
+            fitted[-1] = self._compact(fitted[-1], sizes[-1] - (total - self.budget))
+
+        return fitted
+
+    def _compact(self, message: dict, max_tokens: int) -> dict:
+        content = message.get("content")
+
+        if not isinstance(content, str):
+            return message
+
+        max_bytes = max(0, max_tokens - MESSAGE_OVERHEAD_TOKENS) * C.TOKEN_ESTIMATE_BYTES_PER_TOKEN
+        compacted = content.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+        return {**message, "content": compacted}
@@ -0,0 +1,229 @@
+from .eternal_llm import EternalAIChatCompletion, EarlyStop, parse_sse_line
+from dagent.registry import RegistryCategory, register_decorator
+from dagent.models import InferenceResult, InferenceState, OnChainData
+from dagent.utils import BackgroundEventLoop
+from dagent import constant as C
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Iterator, Callable
+import importlib.util
+import asyncio
+import threading
+import queue
+import logging
+
+# optional dependency (pip install .[http2]), only required once the backend is used
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+_shared_client: Optional["httpx.AsyncClient"] = None
+
+def _get_shared_client() -> "httpx.AsyncClient":
+    # only called from the background event loop, so there is no race on creation
+    global _shared_client
+
+    if _shared_client is None:
+        http2 = importlib.util.find_spec("h2") is not None
+
+        if not http2:
+            logger.warning("h2 is not installed, falling back to HTTP/1.1 (pip install httpx[http2])")
+
+        _shared_client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=C.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=C.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=C.LLM_KEEPALIVE_EXPIRY
+            )
+        )
+
+    return _shared_client
+
+@register_decorator(RegistryCategory.LLM)
+class AsyncIOEternalAIChatCompletion(EternalAIChatCompletion):
+    """Same API as EternalAIChatCompletion, but requests are coroutines running on a shared event loop
+    and all instances share one bounded HTTP/2 keep-alive connection pool"""
+
+    def __init__(self, *args, non_blocking: bool=True, **kwargs):
+        if httpx is None:
+            raise ImportError("httpx is required for AsyncIOEternalAIChatCompletion, install the http2 extra (pip install .[http2])")
+
+        super().__init__(*args, non_blocking=non_blocking, **kwargs)
+
+    def _create_http_session(self):
+        return None
+
+    async def _ainfer(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult:
+        if self.streaming:
+            should_stop = early_stop() if early_stop is not None else (lambda delta: False)
+            return await self._astream(id, _messages, stop, override_kwargs, on_delta=should_stop)
+
+        client = _get_shared_client()
+        timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        last_onchain_data = None
+
+        for _try in range(self.max_retries + 1):
+            if _try > 0:
+                logger.warning("Retrying {} out of {}".format(_try, self.max_retries))
+
+            payload = self._build_payload(_messages, stop, override_kwargs)
+            url = self.openai_api_base + "/v1/chat/completions"
+
+            try:
+                resp = await client.post(
+                    url,
+                    json=payload,
+                    headers=self.headers,
+                    timeout=timeout
+                )
+
+                resp_json = resp.json()
+            except (httpx.HTTPError, ValueError) as err:
+                logger.error("Failed to get a response from the model. Error: {}; URL: {}".format(err, url))
+                continue
+
+            last_onchain_data = resp_json.get('onchain_data')
+
+            if resp.status_code == 200:
+                return InferenceResult(
+                    id=id,
+                    state=InferenceState.DONE,
+                    result=resp_json['choices'][0]['message']['content'],
+                    onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+                )
+
+            logger.error("Failed to get a response from the model. Status code: {}; Text: {}; URL: {}".format(resp.status_code, resp.text, url))
+
+        return InferenceResult(
+            id=id,
+            state=InferenceState.ERROR,
+            error="Failed to get a response from the model",
+            onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+        )
+
+    async def acall(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult:
+        """Awaitable version of the blocking call, usable from any event loop"""
+        future = self._submit(self.generate_uuid(), _messages, stop, override_kwargs, early_stop)
+        return self.commit(await asyncio.wrap_future(future))
+
+    def _submit(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> Future:
+        return BackgroundEventLoop().submit(self._ainfer(id, _messages, stop, override_kwargs, early_stop))
+
+    def _infer(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult:
+        return self._submit(id, _messages, stop, override_kwargs, early_stop).result()
+
+    async def _astream(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, on_delta: Callable[[str], bool]=None) -> InferenceResult:
+        """Streams the completion, handing every delta to `on_delta`; the generation stops once it returns True"""
+        client = _get_shared_client()
+        timeout = httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        payload = self._build_payload(_messages, stop, {**override_kwargs, "stream": True})
+        url = self.openai_api_base + "/v1/chat/completions"
+
+        pieces, last_onchain_data, error = [], None, None
+
+        try:
+            for _try in range(self.max_retries + 1):
+                if _try > 0:
+                    logger.warning("Retrying {} out of {}".format(_try, self.max_retries))
+
+                error = None
+
+                try:
+                    async with client.stream("POST", url, json=payload, headers=self.headers, timeout=timeout) as resp:
+                        if resp.status_code != 200:
+                            error = "Failed to get a response from the model. Status code: {}".format(resp.status_code)
+                            logger.error("{}; URL: {}".format(error, url))
+                            continue
+
+                        async for line in resp.aiter_lines():
+                            done, delta, onchain_data = parse_sse_line(line)
+                            last_onchain_data = onchain_data or last_onchain_data
+
+                            if done:
+                                break
+
+                            if delta:
+                                pieces.append(delta)
+
+                                if on_delta(delta):
+                                    break
+
+                    break
+
+                except (httpx.HTTPError, ValueError) as err:
+                    error = "Failed to get a response from the model: {}".format(err)
+                    logger.error("{}; URL: {}".format(error, url))
+
+                    if len(pieces) > 0:
+                        break
+
+        finally:
+            # also reached when the consumer stops early and the task is cancelled
+            result = self.commit(InferenceResult(
+                id=id,
+                state=InferenceState.DONE if error is None else InferenceState.ERROR,
+                result="".join(pieces) if error is None else None,
+                error=error,
+                onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+            ))
+
+        return result
+
+    def _commit_if_executing(self, id: str, error: str):
+        result = self.get(id)
+
+        if result is not None and result.state == InferenceState.EXECUTING:
+            self.commit(InferenceResult(id=id, state=InferenceState.ERROR, error=error))
+
+    async def _pump(self, que: queue.Queue, claim: Callable[[], bool], id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}):
+        try:
+            # the consumer gave up before the pump started, it has already committed the receipt
+            if not claim():
+                return
+
+            try:
+                await self._astream(id, _messages, stop, override_kwargs, on_delta=que.put)
+            finally:
+                # _astream commits the receipt itself, unless it failed before sending the request
+                self._commit_if_executing(id, "Streaming failed before the request was sent")
+        finally:
+            que.put(None)
+
+    def stream(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, receipt_id: Optional[str]=None) -> Iterator[str]:
+        receipt_id = receipt_id or self.generate_uuid()
+        que = queue.Queue()
+
+        # whoever of the pump and the consumer comes first owns the receipt: the pump commits
+        # the final result once started, otherwise the consumer commits an error when it stops
+        owner, owner_lock = [None], threading.Lock()
+
+        def claim(who: str) -> bool:
+            with owner_lock:
+                if owner[0] is None:
+                    owner[0] = who
+
+                return owner[0] == who
+
+        # the final result is committed from the event loop, possibly after the consumer has stopped
+        self.commit(InferenceResult(id=receipt_id, state=InferenceState.EXECUTING))
+        future = BackgroundEventLoop().submit(
+            self._pump(que, lambda: claim("pump"), receipt_id, _messages, stop, override_kwargs)
+        )
+
+        try:
+            while True:
+                delta = que.get()
+
+                if delta is None:
+                    break
+
+                yield delta
+        finally:
+            # cancels the request when the consumer stops early
+            future.cancel()
+
+            if claim("consumer"):
+                self._commit_if_executing(receipt_id, "Streaming was cancelled before it started")
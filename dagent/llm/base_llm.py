@@ -1,13 +1,34 @@
-from dagent.utils import SimpleCacheMechanism
-from dagent.models import InferenceResult
-from typing import Optional
+from dagent.utils import InferenceResultStore
+from dagent.models import InferenceResult, InferenceState
+from dagent import constant as C
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Iterator
+import threading
 import uuid 
 
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Shared executor running the requests of non-blocking inferences"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=C.LLM_MAX_CONCURRENT_REQUESTS,
+                thread_name_prefix="dagent-inference"
+            )
+
+    return _executor
+
 class AsyncChatCompletion(object):
-    MAX_CACHE_ITEMS = 2048
+    # subclasses keeping no per-mission state set it, one instance per config is then shared by all agents 
+    # (see dagent.component_pool)
+    SHAREABLE = False
 
     def __init__(self, *args, **kwargs):
-        self._cache = SimpleCacheMechanism()
+        self._cache = InferenceResultStore()
 
     def commit(self, result: InferenceResult):
         return self._cache.commit(result)
@@ -18,5 +39,27 @@ class AsyncChatCompletion(object):
     def get(self, id: str, default=None) -> Optional[InferenceResult]:
         return self._cache.get(id, default)
 
+    def wait(self, id: str, timeout: Optional[float]=None) -> Optional[InferenceResult]:
+        """Blocks until the inference `id` is no longer executing or `timeout` expires"""
+        return self._cache.wait(id, timeout)
+
+    def stream(self, _messages, stop=[], override_kwargs={}, receipt_id: Optional[str]=None) -> Iterator[str]:
+        """Yields the completion as it is generated; the final result is committed under `receipt_id`. 
+        Closing the generator early stops the generation. This fallback yields the whole completion at once."""
+
+        receipt_id = receipt_id or self.generate_uuid()
+        result = self.wait(self(_messages, stop, override_kwargs).id)
+
+        self.commit(InferenceResult(
+            id=receipt_id,
+            state=result.state if result is not None else InferenceState.ERROR,
+            result=result.result if result is not None else None,
+            error=result.error if result is not None else "Inference result not found",
+            onchain_data=result.onchain_data if result is not None else None
+        ))
+
+        if result is not None and result.result:
+            yield result.result
+
     def generate_uuid(self) -> str:
-        return str(uuid.uuid4())
\ No newline at end of file
+        return str(uuid.uuid4())
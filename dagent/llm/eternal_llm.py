@@ -1,16 +1,42 @@
-from .base_llm import AsyncChatCompletion
+from .base_llm import AsyncChatCompletion, get_inference_executor
 from dagent.registry import RegistryCategory, register_decorator
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Tuple, Callable
 import logging
+import json
 from dagent.models import InferenceResult, InferenceState, OnChainData
 import requests
+from concurrent.futures import Future
 from dagent import constant as C
 
 logger = logging.getLogger(__name__)
 
+# a factory of stateful predicates, fed with every streamed delta
+EarlyStop = Callable[[], Callable[[str], bool]]
+
+def parse_sse_line(line: str) -> Tuple[bool, Optional[str], Optional[dict]]:
+    """Parses a line of a streamed chat completion. Returns (done, content delta, onchain_data)"""
+    if not line or not line.startswith("data:"):
+        return False, None, None
+
+    data = line[len("data:"):].strip()
+
+    if data == "[DONE]":
+        return True, None, None
+
+    chunk: dict = json.loads(data)
+    choices = chunk.get("choices") or []
+    delta = None
+
+    if len(choices) > 0:
+        delta = (choices[0].get("delta") or {}).get("content")
+
+    return False, delta, chunk.get("onchain_data")
+
 # TODO: convert the openai standard to async standard of eternal AI 
 @register_decorator(RegistryCategory.LLM)
 class EternalAIChatCompletion(AsyncChatCompletion):
+    SHAREABLE = True
+
     DEFAULT_PARAMS = {
         "top_p": 1.0,
         "presence_penalty": 0.0,
@@ -19,7 +45,38 @@ class EternalAIChatCompletion(AsyncChatCompletion):
         "frequency_penalty": 0.0,
     }
 
-    def __call__(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}): 
+    def _build_payload(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}) -> dict:
+        payload = {
+            **self.model_kwargs,
+            **self.DEFAULT_PARAMS,
+            "model": self.model_name,
+            "chain_id": self.chain_id,
+            "messages": _messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stop": stop
+        }
+
+        for k, v in override_kwargs.items():
+            payload[k] = v
+
+        return payload
+
+    def _infer_streaming(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult:
+        should_stop = early_stop() if early_stop is not None else None
+        deltas = self.stream(_messages, stop, override_kwargs, receipt_id=id)
+
+        for delta in deltas:
+            if should_stop is not None and should_stop(delta):
+                break
+
+        # stops the generation if it is not finished yet
+        deltas.close()
+        return self.get(id)
+
+    def _infer(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult:
+        if self.streaming:
+            return self._infer_streaming(id, _messages, stop, override_kwargs, early_stop)
 
         last_onchain_data = None
 
@@ -27,46 +84,124 @@ class EternalAIChatCompletion(AsyncChatCompletion):
             if _try > 0:
                 logger.warning("Retrying {} out of {}".format(_try, self.max_retries))
 
-            payload = {
-                **self.model_kwargs,
-                **self.DEFAULT_PARAMS,
-                "model": self.model_name,
-                "chain_id": self.chain_id,
-                "messages": _messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-                "stop": stop
-            }
-
-            for k, v in override_kwargs.items():
-                payload[k] = v
-                
+            payload = self._build_payload(_messages, stop, override_kwargs)
             url = self.openai_api_base + "/v1/chat/completions"
 
-            resp = self.http_session.post(
-                url, 
-                json=payload
-            )
-            
-            resp_json = resp.json()
+            try:
+                resp = self.http_session.post(
+                    url, 
+                    json=payload,
+                    timeout=(self.connect_timeout, self.timeout)
+                )
+
+                resp_json = resp.json()
+            except (requests.RequestException, ValueError) as err:
+                logger.error("Failed to get a response from the model. Error: {}; URL: {}".format(err, url))
+                continue
+
             last_onchain_data=resp_json.get('onchain_data')
 
             if resp.status_code == 200:
-                return self.commit(InferenceResult(
-                    id=self.generate_uuid(),
+                return InferenceResult(
+                    id=id,
                     state=InferenceState.DONE,
                     result=resp_json['choices'][0]['message']['content'],
-                    onchain_data=OnChainData.model_validate(last_onchain_data)
-                ))
+                    onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+                )
                 
-            logger.error("Failed to get a response from the model. Status code: {}; Text: {}; URL: {}".format(resp.status_code, resp.text, url, last_onchain_data))
+            logger.error("Failed to get a response from the model. Status code: {}; Text: {}; URL: {}".format(resp.status_code, resp.text, url))
 
-        return self.commit(InferenceResult(
-            id=self.generate_uuid(),
+        return InferenceResult(
+            id=id,
             state=InferenceState.ERROR,
             error="Failed to get a response from the model",
-            onchain_data=OnChainData.model_validate(last_onchain_data)
-        ))
+            onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+        )
+
+    def _on_inference_done(self, id: str, future: Future):
+        try:
+            result = future.result()
+        except Exception as err:
+            logger.error("Inference {} failed: {}".format(id, err))
+            result = InferenceResult(
+                id=id,
+                state=InferenceState.ERROR,
+                error="Failed to get a response from the model: {}".format(err)
+            )
+
+        self.commit(result)
+
+    def _submit(self, id: str, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> Future:
+        return get_inference_executor().submit(self._infer, id, _messages, stop, override_kwargs, early_stop)
+
+    def __call__(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, early_stop: Optional[EarlyStop]=None) -> InferenceResult: 
+        """`early_stop` builds a fresh predicate per request; it is fed each streamed delta and 
+        the generation is stopped once it returns True. It is only used in streaming mode."""
+
+        id = self.generate_uuid()
+
+        if not self.non_blocking:
+            return self.commit(self._infer(id, _messages, stop, override_kwargs, early_stop))
+
+        # return the receipt right away, the result is committed once the request completes
+        receipt = self.commit(InferenceResult(id=id, state=InferenceState.EXECUTING))
+        future = self._submit(id, _messages, stop, override_kwargs, early_stop)
+        future.add_done_callback(lambda f: self._on_inference_done(id, f))
+        return receipt
+
+    def stream(self, _messages: List[Dict[str, str]], stop: List[str]=[], override_kwargs: dict={}, receipt_id: Optional[str]=None) -> Iterator[str]:
+        receipt_id = receipt_id or self.generate_uuid()
+        payload = self._build_payload(_messages, stop, {**override_kwargs, "stream": True})
+        url = self.openai_api_base + "/v1/chat/completions"
+
+        pieces, last_onchain_data, error = [], None, None
+
+        try:
+            for _try in range(self.max_retries + 1):
+                if _try > 0:
+                    logger.warning("Retrying {} out of {}".format(_try, self.max_retries))
+
+                error = None
+
+                try:
+                    with self.http_session.post(url, json=payload, stream=True, timeout=(self.connect_timeout, self.timeout)) as resp:
+                        if resp.status_code != 200:
+                            error = "Failed to get a response from the model. Status code: {}".format(resp.status_code)
+                            logger.error("{}; Text: {}; URL: {}".format(error, resp.text, url))
+                            continue
+
+                        resp.encoding = resp.encoding or "utf-8"
+
+                        for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+                            done, delta, onchain_data = parse_sse_line(line)
+                            last_onchain_data = onchain_data or last_onchain_data
+
+                            if done:
+                                break
+
+                            if delta:
+                                pieces.append(delta)
+                                yield delta
+
+                    break
+
+                except (requests.RequestException, ValueError) as err:
+                    error = "Failed to get a response from the model: {}".format(err)
+                    logger.error("{}; URL: {}".format(error, url))
+
+                    # a half-received completion can not be retried transparently
+                    if len(pieces) > 0:
+                        break
+
+        finally:
+            # also reached when the consumer stops early, the partial completion is kept
+            self.commit(InferenceResult(
+                id=receipt_id,
+                state=InferenceState.DONE if error is None else InferenceState.ERROR,
+                result="".join(pieces) if error is None else None,
+                error=error,
+                onchain_data=OnChainData.model_validate(last_onchain_data) if last_onchain_data else None
+            ))
 
     def __init__(
         self, 
@@ -78,6 +213,11 @@ class EternalAIChatCompletion(AsyncChatCompletion):
         eternal_api_key: str=C.ETERNALAI_API_KEY,
         model_name: str=C.ETERNAL_MODEL_NAME, 
         eternal_chain_id: str=C.ETERNAL_CHAIN_ID,
+        non_blocking: bool=False,
+        streaming: bool=False,
+        timeout: float=C.LLM_REQUEST_TIMEOUT,
+        connect_timeout: float=C.LLM_CONNECT_TIMEOUT,
+        context_window: int=C.DEFAULT_CONTEXT_WINDOW,
         *args, **kwargs
     ):
         super().__init__()
@@ -95,10 +235,31 @@ class EternalAIChatCompletion(AsyncChatCompletion):
         self.max_tokens = max_tokens
         self.max_retries = max_retries
         self.chain_id = eternal_chain_id
-        self.http_session = requests.Session()
-        self.http_session.headers.update(
-            {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.eternal_api_key}"
-            }
+        self.non_blocking = non_blocking
+        self.streaming = streaming
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.context_window = context_window
+        self.http_session = self._create_http_session()
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.eternal_api_key}"
+        }
+
+    def _create_http_session(self) -> requests.Session:
+        http_session = requests.Session()
+        http_session.headers.update(self.headers)
+
+        # the session is shared by every agent using this config, size the pool for concurrent requests
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=C.LLM_MAX_CONNECTIONS
         )
+
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
+        return http_session
+
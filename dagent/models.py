@@ -30,6 +30,18 @@ class Tool(BaseModel):
     description: str
     param_spec: List[ToolParam]
     executor: Callable
+
+    # seconds before the call is given up, C.DEFAULT_TOOL_TIMEOUT when not set
+    timeout: Optional[float] = None
+
+    # read-only tools may cache their results for `cache_ttl` seconds (see dagent.tools.tool_cache),
+    # `cache_key` maps the call parameters to the cache key, e.g. to normalize usernames
+    cache_ttl: Optional[float] = None
+    cache_max_size: int = 256
+    cache_key: Optional[Callable[..., Any]] = None
+
+    # safe to run twice, e.g. when a mission is resumed after a restart, tools with a `cache_ttl` are considered idempotent
+    idempotent: bool = False
     
     def prototype(self):
         params_str = ', '.join([f"{param.name}: {param.dtype.value}" 
@@ -76,7 +88,7 @@ class DAgentLog(BaseModel):
     # for response
     infer_receipt: Optional[str] = None
     state: ChainState = ChainState.NEW
-    scratchpad: List[Dict[str, str]] = []
+    scratchpad: List[Dict[str, Any]] = []
 
     system_message: str = "" # for error messages
     verbose: bool = True
@@ -120,11 +132,17 @@ class DAgentResponse(BaseModel):
 
 class NonInteractiveDAgentLog(DAgentLog):
     mission: Mission
+
+    # rolling summary of the scratchpad entries before `summarized_until` (the task excluded)
+    summary: Optional[str] = None
+    summarized_until: int = 0
     
     def clone(self):
         return dict(
             **super().clone(),
-            mission=self.mission.model_dump()
+            mission=self.mission.model_dump(),
+            summary=self.summary,
+            summarized_until=self.summarized_until
         )
 
 class ChatSession(BaseModel):
@@ -147,7 +165,7 @@ class ChatSession(BaseModel):
     agent_builder_cfg: Optional[ClassRegistration] = None
     character_builder_cfg: Optional[ClassRegistration] = None
 
-    last_execution: Optional[float] = time.time()
+    last_execution: Optional[float] = Field(default_factory=time.time)
 
 # TODO: there should be a cachable interface
 class InferenceResult(Serializable):
@@ -164,9 +182,10 @@ class InferenceResult(Serializable):
             "state": self.state,
             "result": self.result,
             "error": self.error,
-            "tx_hash": self.tx_hash
+            "onchain_data": self.onchain_data.model_dump() if self.onchain_data is not None else None
         }
 
+
 class TweetObject(Serializable):
     """Represents a tweet from Twitter."""
 
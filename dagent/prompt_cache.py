@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Callable, List
+from singleton_decorator import singleton
+from .models import Characteristic, ClassRegistration
+from . import constant as C
+import hashlib
+import threading
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def prompt_key(*parts) -> str:
+    blob = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def characteristic_hash(characteristic: Characteristic) -> str:
+    return hashlib.sha256(characteristic.model_dump_json().encode("utf-8")).hexdigest()
+
+def toolset_key(cfg: List[ClassRegistration]) -> str:
+    return prompt_key([(e.name, e.init_params) for e in cfg])
+
+@singleton
+class PromptCache(object):
+    """Bounded LRU of compiled prompts. Entries are plain (immutable) strings, so they can be shared by every agent"""
+
+    def __init__(self, max_items: int=C.PROMPT_CACHE_MAX_ITEMS) -> None:
+        self.max_items = max_items
+
+        self._prompts: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_compile(self, key: str, compile: Callable[[], str]) -> str:
+        with self._lock:
+            prompt = self._prompts.get(key)
+
+            if prompt is not None:
+                self._prompts.move_to_end(key)
+                self._hits += 1
+                return prompt
+
+            self._misses += 1
+
+        # compiled outside of the lock, a concurrent miss at worst compiles the same prompt twice
+        prompt = compile()
+
+        with self._lock:
+            self._prompts[key] = prompt
+            self._prompts.move_to_end(key)
+
+            while len(self._prompts) > self.max_items:
+                self._prompts.popitem(last=False)
+
+        return prompt
+
+    def clear(self):
+        with self._lock:
+            self._prompts.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._prompts),
+                "hits": self._hits,
+                "misses": self._misses
+            }
+
+def compile_system_prompt(builder: Callable[[Characteristic], str], cfg: ClassRegistration, characteristic: Characteristic) -> str:
+    # builders producing a different prompt on every call (e.g. shuffling) opt out with `cacheable = False`
+    if not getattr(builder, "cacheable", True):
+        return builder(characteristic)
+
+    key = prompt_key("character", cfg.name, cfg.init_params, characteristic_hash(characteristic))
+    return PromptCache().get_or_compile(key, lambda: builder(characteristic))
@@ -9,13 +9,23 @@ import threading
 import time 
 import logging
 import traceback
+import json
+import os
+import datetime
+import heapq
+import itertools
 from . import constant as C
 from .registry import get_cls, RegistryCategory 
-from typing import Any, Callable, Union, Dict
+from typing import Any, Callable, Union, Dict, Optional
 import schedule
 from .characters import DEFAULT_CHAT_COMPLETION_CHARACTER_BUILDER
 from .agents import NonInteractiveDAgentBase
 from .llm import AsyncChatCompletion
+from .utils import InferenceResultStore
+from .prompt_cache import PromptCache
+from .component_pool import ComponentPool
+from .tools.tool_cache import tool_cache_stats
+from .storage import SQLiteMissionStore
 from singleton_decorator import singleton
 
 logger = logging.getLogger(__name__)
@@ -25,15 +35,80 @@ class AutoServiceProvider(object):
     SCRATCHPAD_LENGTH_LIMIT = 30
     CHAT_SESSION_TIMEOUT = 60 * 60 * 3 # 3 hours
 
-    def __init__(self) -> None:
+    def __init__(
+        self, 
+        num_workers: int = C.AUTO_SERVICE_NUM_WORKERS, 
+        checkpoint_path: Optional[str] = C.MISSION_CHECKPOINT_PATH
+    ) -> None:
+        assert num_workers > 0, "num_workers must be a positive integer"
+
         self._que = queue.Queue() # a queue of NonInteractiveDAgent
         self._interactive_sessions: Dict[str, ChatSession] = {}
-        self._sleep_time = C.AUTO_SERVICE_SLEEP_TIME
+        # an agent waiting for a completion signal is re-checked at least this often
+        self._recheck_interval = C.AUTO_SERVICE_SLEEP_TIME
+
+        # timer heap of (deadline, seq, fn) served by the background thread
+        self._timers = []
+        self._timers_seq = itertools.count()
+        self._timers_cond = threading.Condition()
+        self._waiting_agents = 0
+
+        # optional checkpoints of in-flight missions, used to resume them after a restart
+        self._checkpoints: Optional[SQLiteMissionStore] = None
+        self._checkpoint_marks: Dict[str, tuple] = {}
+
+        if checkpoint_path:
+            logger.info(f"Checkpointing missions to {checkpoint_path}")
+            self._checkpoints = SQLiteMissionStore(checkpoint_path)
+
+        self._num_workers = num_workers
+        self._workers = []
+
+        # worker utilization bookkeeping
+        self._stats_lock = threading.Lock()
+        self._busy_workers = 0
+        self._busy_time = 0.0
+        self._processed_steps = 0
+        self._started_at = None
 
     def start(self):
+        self._started_at = time.time()
+
+        for i in range(self._num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop, 
+                name=f"dagent-worker-{i}", 
+                daemon=True
+            )
+
+            worker.start()
+            self._workers.append(worker)
+
         self._background_thread = threading.Thread(target=self._run, daemon=True)
         self._background_thread.start()
 
+    def stats(self) -> dict:
+        with self._stats_lock:
+            busy_workers = self._busy_workers
+            busy_time = self._busy_time
+            processed_steps = self._processed_steps
+
+        uptime = 0.0 if self._started_at is None else time.time() - self._started_at
+        capacity = uptime * self._num_workers
+
+        return {
+            "queue_depth": self._que.qsize(),
+            "num_workers": self._num_workers,
+            "busy_workers": busy_workers,
+            "processed_steps": processed_steps,
+            "waiting_agents": self._waiting_agents,
+            "utilization": busy_time / capacity if capacity > 0 else 0.0,
+            "inference_store": InferenceResultStore().stats(),
+            "prompt_cache": PromptCache().stats(),
+            "component_pool": ComponentPool().stats(),
+            "tool_cache": tool_cache_stats()
+        }
+
     def schedule(self, cfg: dict):
         def get_or_warning(d: dict, key: str, default: Any = None) -> Any:
             if key not in d:
@@ -91,57 +166,183 @@ class AutoServiceProvider(object):
 
                 schedule.every(interval=interval_minutes).minutes.do(self.enqueue, creator)
 
-    def enqueue(self, state: Union[DAgentLog, Callable]) -> DAgentLog:
-        if callable(state):
+    def enqueue(self, state: Union[NonInteractiveDAgentBase, Callable]) -> NonInteractiveDAgentBase:
+        if not isinstance(state, NonInteractiveDAgentBase) and callable(state):
             state = state()
         
         logger.info("Enqueueing a new state; ID: %s", state.id)
         self._que.put(state)
         return state
 
-    def _run(self):
-        logger.info("The service is running asynchronously in background")
-        
-        while True:            
-            que_length = self._que.qsize()
-            
-            if que_length > 0:
-                logger.info("Processing %d items in the queue", que_length)
+    def _dump_log(self, log_state: NonInteractiveDAgentLog):
+        os.makedirs("logs", exist_ok=True)
+        dtime_str = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+
+        with open(f"logs/{dtime_str}_{log_state.id}.json", "w") as f:
+            json.dump(log_state.model_dump(), f, indent=4)
+
+    def call_later(self, delay: float, fn: Callable[[], None]):
+        with self._timers_cond:
+            heapq.heappush(self._timers, (time.time() + delay, next(self._timers_seq), fn))
+            self._timers_cond.notify()
+
+    def add_session(self, session: ChatSession) -> ChatSession:
+        self._interactive_sessions[session.id] = session
+        self.call_later(self.CHAT_SESSION_TIMEOUT, lambda: self._expire_session(session.id))
+        return session
+
+    def _expire_session(self, session_id: str):
+        session = self._interactive_sessions.get(session_id)
+
+        if session is None:
+            return
+
+        idle_time = time.time() - session.last_execution
+
+        if idle_time <= self.CHAT_SESSION_TIMEOUT:
+            self.call_later(self.CHAT_SESSION_TIMEOUT - idle_time, lambda: self._expire_session(session_id))
+            return
+
+        logger.info(f"Removing chat session {session_id}")
+        self._interactive_sessions.pop(session_id, None)
+
+    def _park(self, agent: NonInteractiveDAgentBase):
+        lock = threading.Lock()
+        woken = False
+
+        def wake():
+            nonlocal woken
+
+            with lock:
+                if woken:
+                    return
 
-            while not self._que.empty():
-                agent: NonInteractiveDAgentBase = self._que.get()
+                woken = True
 
-                try:
-                    log_state: NonInteractiveDAgentLog = agent.step()
+            with self._stats_lock:
+                self._waiting_agents -= 1
 
-                    if agent.state in [ChainState.DONE, ChainState.ERROR]:
-                        if agent.state == ChainState.DONE:
-                            logger.info(f"Mission {agent.id} is done")
+            self._que.put(agent)
 
-                        else:
-                            logger.error(f"Mission {agent.id} has failed")
-                            
-                        import json, os, datetime
-                        os.makedirs("logs", exist_ok=True)
-                        dtime_str = datetime.datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-                        with open(f"logs/{dtime_str}_{agent.id}.json", "w") as f:
-                            json.dump(log_state.model_dump(), f, indent=4)
+        with self._stats_lock:
+            self._waiting_agents += 1
 
-                        continue 
+        if not agent.notify_when_ready(wake):
+            wake()
+            return
 
-                    self._que.put(agent)
+        # safety net in case the completion signal never comes
+        self.call_later(self._recheck_interval, wake)
 
-                except Exception as err:
-                    traceback.print_exc()
+    def restore(self) -> int:
+        """Re-enqueues the missions checkpointed before a restart, returns how many"""
+        if self._checkpoints is None:
+            return 0
 
-            to_be_removed_sessions = []
+        n_restored = 0
 
-            for session_id, session in self._interactive_sessions.items():
-                if time.time() - session.last_execution > self.CHAT_SESSION_TIMEOUT:
-                    to_be_removed_sessions.append(session_id)
+        for log in self._checkpoints.load_all():
+            agent_cls = get_cls(RegistryCategory.NonInteractiveDAgent, log.agent_builder_cfg.name)
+
+            if agent_cls is None:
+                logger.error(f"Agent class {log.agent_builder_cfg.name} of mission {log.id} not found")
+                continue
+
+            try:
+                agent = agent_cls(log, **log.agent_builder_cfg.init_params)
+            except Exception as err:
+                logger.error(f"Failed to restore mission {log.id}: {err}")
+                continue
+
+            logger.info(f"Restoring mission {log.id} at step {len(log.scratchpad)}")
+            self._checkpoint_marks[log.id] = self._checkpoint_mark(log)
+            self.enqueue(agent)
+            n_restored += 1
+
+        return n_restored
+
+    def _checkpoint_mark(self, log: NonInteractiveDAgentLog) -> tuple:
+        last_entry = json.dumps(log.scratchpad[-1]) if len(log.scratchpad) > 0 else None
+        return (log.state, log.infer_receipt, log.system_message, len(log.scratchpad), last_entry, log.summarized_until)
+
+    def _checkpoint(self, agent: NonInteractiveDAgentBase):
+        if self._checkpoints is None:
+            return
+
+        log: NonInteractiveDAgentLog = agent.log
+
+        if log.state in [ChainState.DONE, ChainState.ERROR]:
+            self._checkpoint_marks.pop(log.id, None)
+            self._checkpoints.remove(log.id)
+            return
+
+        mark = self._checkpoint_mark(log)
+        last_mark = self._checkpoint_marks.get(log.id)
+
+        if mark == last_mark:
+            return
+
+        # only the last scratchpad entry is updated in place, earlier entries are already written
+        from_idx = 0 if last_mark is None else max(0, min(last_mark[3], len(log.scratchpad)) - 1)
+
+        # the rolling summary is part of the static fields, rewritten when a new fold is done
+        write_static = last_mark is None or last_mark[5] != log.summarized_until
+        self._checkpoints.checkpoint(log, from_idx, write_static=write_static)
+        self._checkpoint_marks[log.id] = mark
+
+    def _process(self, agent: NonInteractiveDAgentBase):
+        # an agent is in the queue at most once and only gets back to it after its 
+        # step is done, so one agent never has two steps in flight
+        log_state: NonInteractiveDAgentLog = agent.step()
+
+        try:
+            self._checkpoint(agent)
+        except Exception as err:
+            logger.error(f"Failed to checkpoint mission {agent.id}: {err}")
+
+        if agent.state in [ChainState.DONE, ChainState.ERROR]:
+            if agent.state == ChainState.DONE:
+                logger.info(f"Mission {agent.id} is done")
+
+            else:
+                logger.error(f"Mission {agent.id} has failed")
+
+            self._dump_log(log_state)
+            return
+
+        self._park(agent)
+
+    def _worker_loop(self):
+        while True:
+            agent: NonInteractiveDAgentBase = self._que.get()
+
+            with self._stats_lock:
+                self._busy_workers += 1
+
+            start = time.time()
+
+            try:
+                self._process(agent)
+            except Exception as err:
+                traceback.print_exc()
+            finally:
+                with self._stats_lock:
+                    self._busy_workers -= 1
+                    self._busy_time += time.time() - start
+                    self._processed_steps += 1
+
+    def _run(self):
+        logger.info("The service is running asynchronously in background with %d workers", self._num_workers)
+        
+        while True:
+            with self._timers_cond:
+                while len(self._timers) == 0 or self._timers[0][0] > time.time():
+                    timeout = None if len(self._timers) == 0 else self._timers[0][0] - time.time()
+                    self._timers_cond.wait(timeout=timeout)
 
-            for session_id in to_be_removed_sessions:
-                logger.info(f"Removing chat session {session_id}")
-                del self._interactive_sessions[session_id]
+                _, _, fn = heapq.heappop(self._timers)
 
-            time.sleep(self._sleep_time)
\ No newline at end of file
+            try:
+                fn()
+            except Exception as err:
+                traceback.print_exc()
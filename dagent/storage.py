@@ -0,0 +1,414 @@
+from .models import InferenceResult, InferenceState, OnChainData, NonInteractiveDAgentLog
+from typing import Optional, List, Tuple
+import threading
+import sqlite3
+import logging
+import time
+import json
+import hashlib
+import os
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStorage(object):
+    """A sqlite database in WAL mode shared by threads through a single, lock-protected connection"""
+
+    SCHEMA = ""
+
+    def __init__(self, path: str) -> None:
+        dirname = os.path.dirname(path)
+
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SQLiteResultStore(SQLiteStorage):
+    """On-disk inference results keyed by receipt id, so that receipts survive restarts"""
+
+    SCHEMA = '''
+CREATE TABLE IF NOT EXISTS inference_results (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    onchain_data TEXT,
+    committed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS inference_results_committed_at ON inference_results (committed_at);
+'''
+
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, path: str, retention: float) -> None:
+        super().__init__(path)
+        self.retention = retention
+        self._last_prune = 0.0
+
+    def put(self, result: InferenceResult):
+        if result.state == InferenceState.EXECUTING:
+            return
+
+        now = time.time()
+        onchain_data = result.onchain_data.model_dump_json() if result.onchain_data is not None else None
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO inference_results VALUES (?, ?, ?, ?, ?, ?)",
+                (result.id, result.state.value, result.result, result.error, onchain_data, now)
+            )
+
+        if now - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune(now)
+
+    def get(self, id: str) -> Optional[InferenceResult]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, state, result, error, onchain_data FROM inference_results WHERE id = ? AND committed_at >= ?",
+                (id, time.time() - self.retention)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return InferenceResult(
+            id=row[0],
+            state=InferenceState(row[1]),
+            result=row[2],
+            error=row[3],
+            onchain_data=OnChainData.model_validate(json.loads(row[4])) if row[4] else None
+        )
+
+    def prune(self, now: Optional[float] = None):
+        now = now or time.time()
+        self._last_prune = now
+
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM inference_results WHERE committed_at < ?", 
+                (now - self.retention,)
+            ).rowcount
+
+        if deleted > 0:
+            logger.info(f"Pruned {deleted} inference results older than {self.retention} seconds")
+
+class SQLiteMissionStore(SQLiteStorage):
+    """Checkpoints of in-flight missions. The static part of a mission is written once and 
+    scratchpad entries are upserted one by one, so a checkpoint only writes what has changed."""
+
+    SCHEMA = '''
+CREATE TABLE IF NOT EXISTS missions (
+    id TEXT PRIMARY KEY,
+    static TEXT NOT NULL,
+    state TEXT NOT NULL,
+    infer_receipt TEXT,
+    system_message TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scratchpad (
+    mission_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (mission_id, idx)
+);
+'''
+
+    DYNAMIC_FIELDS = {"id", "state", "infer_receipt", "system_message", "scratchpad"}
+
+    def checkpoint(self, log: NonInteractiveDAgentLog, from_idx: int, write_static: bool):
+        """Writes the mission state and scratchpad entries from `from_idx` on"""
+        entries = [
+            (log.id, idx, json.dumps(log.scratchpad[idx]))
+            for idx in range(from_idx, len(log.scratchpad))
+        ]
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+
+            try:
+                if write_static:
+                    static = log.model_dump_json(exclude=self.DYNAMIC_FIELDS)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO missions VALUES (?, ?, ?, ?, ?, ?)",
+                        (log.id, static, log.state.value, log.infer_receipt, log.system_message, time.time())
+                    )
+
+                else:
+                    self._conn.execute(
+                        "UPDATE missions SET state = ?, infer_receipt = ?, system_message = ?, updated_at = ? WHERE id = ?",
+                        (log.state.value, log.infer_receipt, log.system_message, time.time(), log.id)
+                    )
+
+                self._conn.executemany("INSERT OR REPLACE INTO scratchpad VALUES (?, ?, ?)", entries)
+                self._conn.execute(
+                    "DELETE FROM scratchpad WHERE mission_id = ? AND idx >= ?", 
+                    (log.id, len(log.scratchpad))
+                )
+
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, id: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM scratchpad WHERE mission_id = ?", (id,))
+            self._conn.execute("DELETE FROM missions WHERE id = ?", (id,))
+            self._conn.execute("COMMIT")
+
+    def load_all(self) -> List[NonInteractiveDAgentLog]:
+        with self._lock:
+            missions = self._conn.execute(
+                "SELECT id, static, state, infer_receipt, system_message FROM missions ORDER BY updated_at"
+            ).fetchall()
+
+            entries = self._conn.execute(
+                "SELECT mission_id, entry FROM scratchpad ORDER BY mission_id, idx"
+            ).fetchall()
+
+        scratchpads = {}
+
+        for mission_id, entry in entries:
+            scratchpads.setdefault(mission_id, []).append(json.loads(entry))
+
+        logs = []
+
+        for id, static, state, infer_receipt, system_message in missions:
+            try:
+                logs.append(NonInteractiveDAgentLog(
+                    **json.loads(static),
+                    id=id,
+                    state=state,
+                    infer_receipt=infer_receipt,
+                    system_message=system_message or "",
+                    scratchpad=scratchpads.get(id, [])
+                ))
+            except Exception as err:
+                logger.error(f"Failed to load the checkpoint of mission {id}: {err}")
+
+        return logs
+
+class SQLiteCursorStore(SQLiteStorage):
+    """High-water marks (since_id) and claims of incrementally polled feeds, e.g. mentions per username.
+    A claimed item is returned again once its lease expires, unless it has been completed meanwhile"""
+
+    SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cursors (
+    key TEXT PRIMARY KEY,
+    since_id INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS claims (
+    key TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (key, item_id)
+);
+CREATE INDEX IF NOT EXISTS claims_item_id ON claims (item_id);
+CREATE INDEX IF NOT EXISTS claims_updated_at ON claims (updated_at);
+'''
+
+    CLAIMED = "claimed"
+    DONE = "done"
+
+    PRUNE_INTERVAL = 60 * 60
+
+    def __init__(self, path: str, retention: float, lease: float, max_attempts: int) -> None:
+        super().__init__(path)
+        self.retention = retention
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._last_prune = 0.0
+
+    def get_cursor(self, key: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT since_id FROM cursors WHERE key = ?", (key,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def advance_cursor(self, key: str, since_id: int):
+        """Moves the cursor forward, never backward"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cursors VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "since_id = excluded.since_id, updated_at = excluded.updated_at WHERE excluded.since_id > cursors.since_id",
+                (key, since_id, time.time())
+            )
+
+    def claim(self, key: str, items: List[Tuple[str, str]], limit: Optional[int]=None) -> List[Tuple[str, str]]:
+        """Atomically claims up to `limit` (item_id, payload): first those whose lease expired without being 
+        completed, then the new ones of `items` in order. Returns the claimed (item_id, payload)"""
+        now = time.time()
+        claimed = []
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+
+            try:
+                expired = self._conn.execute(
+                    "SELECT item_id, payload, attempts FROM claims WHERE key = ? AND state = ? AND updated_at < ? "
+                    "ORDER BY updated_at",
+                    (key, self.CLAIMED, now - self.lease)
+                ).fetchall()
+
+                for item_id, payload, attempts in expired:
+                    if attempts >= self.max_attempts:
+                        logger.warning(f"Giving up {key}/{item_id} after {attempts} attempts")
+                        self._conn.execute(
+                            "UPDATE claims SET state = ?, updated_at = ? WHERE key = ? AND item_id = ?",
+                            (self.DONE, now, key, item_id)
+                        )
+
+                    elif limit is None or len(claimed) < limit:
+                        self._conn.execute(
+                            "UPDATE claims SET attempts = attempts + 1, updated_at = ? WHERE key = ? AND item_id = ?",
+                            (now, key, item_id)
+                        )
+                        claimed.append((item_id, payload))
+
+                for item_id, payload in items:
+                    if limit is not None and len(claimed) >= limit:
+                        break
+
+                    inserted = self._conn.execute(
+                        "INSERT OR IGNORE INTO claims VALUES (?, ?, ?, ?, 1, ?)", 
+                        (key, item_id, payload, self.CLAIMED, now)
+                    ).rowcount
+
+                    if inserted > 0:
+                        claimed.append((item_id, payload))
+
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if now - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune(now)
+
+        return claimed
+
+    def complete(self, item_id: str):
+        """Marks the item as handled (under any key), it is not returned again"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE claims SET state = ?, updated_at = ? WHERE item_id = ?", 
+                (self.DONE, time.time(), item_id)
+            )
+
+    def prune(self, now: Optional[float] = None):
+        now = now or time.time()
+        self._last_prune = now
+
+        with self._lock:
+            self._conn.execute("DELETE FROM claims WHERE updated_at < ?", (now - self.retention,))
+
+class SQLiteURLCache(SQLiteStorage):
+    """Text extracted from crawled urls, with the validators (ETag / Last-Modified) to revalidate it"""
+
+    SCHEMA = '''
+CREATE TABLE IF NOT EXISTS url_cache (
+    url TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS url_cache_fetched_at ON url_cache (fetched_at);
+'''
+
+    PRUNE_INTERVAL = 60 * 60
+
+    def __init__(self, path: str, retention: float) -> None:
+        super().__init__(path)
+        self.retention = retention
+        self._last_prune = 0.0
+
+    def get(self, url: str) -> Optional[Tuple[str, Optional[str], Optional[str], float]]:
+        """Returns (text, etag, last_modified, fetched_at)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT text, etag, last_modified, fetched_at FROM url_cache WHERE url = ?", (url,)
+            ).fetchone()
+
+    def put(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]):
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO url_cache VALUES (?, ?, ?, ?, ?)",
+                (url, text, etag, last_modified, now)
+            )
+
+        if now - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune(now)
+
+    def touch(self, url: str):
+        with self._lock:
+            self._conn.execute("UPDATE url_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def prune(self, now: Optional[float] = None):
+        now = now or time.time()
+        self._last_prune = now
+
+        with self._lock:
+            self._conn.execute("DELETE FROM url_cache WHERE fetched_at < ?", (now - self.retention,))
+
+class SQLiteObservationStore(SQLiteStorage):
+    """Tool observations too large for the scratchpad, referenced there by a handle (hash of the content)"""
+
+    SCHEMA = '''
+CREATE TABLE IF NOT EXISTS observations (
+    handle TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_stored_at ON observations (stored_at);
+'''
+
+    PRUNE_INTERVAL = 60 * 60
+
+    def __init__(self, path: str, retention: float) -> None:
+        super().__init__(path)
+        self.retention = retention
+        self._last_prune = 0.0
+
+    def put(self, content: str) -> str:
+        handle = "obs-" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO observations VALUES (?, ?, ?)", (handle, content, now))
+
+        if now - self._last_prune > self.PRUNE_INTERVAL:
+            self.prune(now)
+
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM observations WHERE handle = ?", (handle,)).fetchone()
+
+        return row[0] if row is not None else None
+
+    def prune(self, now: Optional[float] = None):
+        now = now or time.time()
+        self._last_prune = now
+
+        with self._lock:
+            self._conn.execute("DELETE FROM observations WHERE stored_at < ?", (now - self.retention,))
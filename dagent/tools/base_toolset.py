@@ -1,22 +1,134 @@
-from typing import List
+from typing import List, Dict, Optional, Tuple, Any, Callable
 from dagent.models import Tool
+from dagent import constant as C
+from dagent.utils import TimerThread
+from .tool_cache import get_tool_cache
+from concurrent.futures import ThreadPoolExecutor, Future
+import threading
+import asyncio
 import traceback
 import random
 
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Shared, bounded executor running tool calls"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=C.TOOL_MAX_CONCURRENCY,
+                thread_name_prefix="dagent-tool"
+            )
+
+    return _executor
+
+def _run_with_timeout(fn: Callable[[], Any], timeout: float, message: str, busy_message: str) -> Future:
+    """Runs `fn` on the tool executor. The returned future resolves with `message` once `fn` has been 
+    running for `timeout` seconds, or with `busy_message` if `fn` could not start within `timeout` seconds 
+    because the executor is full. A running call can not be interrupted, its late result is dropped"""
+    outer = Future()
+    outer.set_running_or_notify_cancel()
+    lock = threading.Lock()
+    started = [False]
+
+    def finish(result=None, error: Optional[BaseException]=None):
+        with lock:
+            if outer.done():
+                return
+
+            if error is not None:
+                outer.set_exception(error)
+            else:
+                outer.set_result(result)
+
+    def reject():
+        with lock:
+            if started[0] or outer.done():
+                return
+
+            outer.set_result(busy_message)
+
+    def run():
+        with lock:
+            # rejected while queued
+            if outer.done():
+                return
+
+            started[0] = True
+
+        TimerThread().cancel(queued)
+        deadline = TimerThread().call_later(timeout, lambda: finish(message))
+
+        try:
+            result = fn()
+        except BaseException as err:
+            finish(error=err)
+        else:
+            finish(result)
+        finally:
+            TimerThread().cancel(deadline)
+
+    queued = TimerThread().call_later(timeout, reject)
+    get_tool_executor().submit(run)
+    return outer
+
+def _gather(futures: List[Future]) -> Future:
+    outer = Future()
+    outer.set_running_or_notify_cancel()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def on_done(_):
+        with lock:
+            remaining[0] -= 1
+
+            if remaining[0] > 0:
+                return
+
+        outer.set_result([f.result() for f in futures])
+
+    if len(futures) == 0:
+        outer.set_result([])
+
+    for f in futures:
+        f.add_done_callback(on_done)
+
+    return outer
+
 class Toolset(object):
     TOOLSET_NAME = "default"
     TOOLS: List[Tool] = []
     PURPOSE = "to get information or take action"
+    # stateless or thread-safe toolsets set it to be shared by all agents (see dagent.component_pool)
+    SHAREABLE = False
 
-    def __init__(self, 
+    def __init__(self,
                 exclude=[],
                 shuffle_results=False
     ) -> None:
         self.tools = [
-            tool for tool in self.TOOLS 
+            tool for tool in self.TOOLS
             if tool.name not in exclude
         ]
         self.shuffle_results = shuffle_results
+        self._build_index()
+
+    def _build_index(self):
+        # name -> tool and its number of parameters, built once so that executing a tool is a dict lookup
+        self._index: Dict[str, Tool] = {}
+        self._num_params: Dict[str, int] = {}
+
+        for tool in self.tools:
+            if tool.name in self._index:
+                raise ValueError(f"Tool {tool.name} is defined more than once in toolset {self.TOOLSET_NAME}")
+
+            self._index[tool.name] = tool
+            self._num_params[tool.name] = len(tool.param_spec)
+
+        self._names = list(self._index.keys())
 
     def render_instruction(self):
         instruct = f'Toolset {self.TOOLSET_NAME}: {self.PURPOSE}:\n'
@@ -28,49 +140,82 @@ class Toolset(object):
 
     @property
     def names(self):
-        return [tool.name for tool in self.tools]
+        return self._names
+
+    def get_tool(self, name: str) -> Optional[Tool]:
+        return self._index.get(name)
+
+    def submit(self, name: str, inp: str) -> Future:
+        """Runs the tool on the shared tool executor, the future resolves with its result or a timeout message"""
+        tool = self._index.get(name)
+        timeout = tool.timeout if tool is not None and tool.timeout is not None else C.DEFAULT_TOOL_TIMEOUT
+
+        return _run_with_timeout(
+            lambda: self.execute(name, inp),
+            timeout,
+            f"{name} timed out after {timeout} seconds",
+            f"{name} could not start within {timeout} seconds, the tool executor is busy"
+        )
+
+    async def aexecute(self, name: str, inp: str):
+        """Awaitable version of `execute` for asyncio callers"""
+        return await asyncio.wrap_future(self.submit(name, inp))
+
+    def submit_many(self, calls: List[Tuple[str, str]]) -> Future:
+        """Runs independent (name, input) calls concurrently, the future resolves with their results in order"""
+        return _gather([self.submit(name, inp) for name, inp in calls])
+
+    def is_idempotent(self, name: str) -> bool:
+        tool = self._index.get(name)
+        return tool is not None and (tool.idempotent or tool.cache_ttl is not None)
+
+    def resubmit(self, name: str, inp: str) -> Future:
+        """Runs again a call which was interrupted by a restart. Calls which are not idempotent may have taken 
+        effect already (e.g. a tweet), they are not run twice but resolve with a note that their outcome is unknown"""
+        if self.is_idempotent(name):
+            return self.submit(name, inp)
+
+        future = Future()
+        future.set_result(
+            f"The outcome of {name} is unknown, the process restarted while this action was running. "
+            "Check whether it took effect before doing it again"
+        )
+        return future
+
+    def resubmit_many(self, calls: List[Tuple[str, str]]) -> Future:
+        return _gather([self.resubmit(name, inp) for name, inp in calls])
 
     def execute(self, name: str, inp: str):
-        params = inp.split("|")
-        tool = None
-        
-        for t in self.tools:
-            if t.name == name:
-                tool = t
-                break 
-            
+        tool = self._index.get(name)
+
         if tool is None:
             return f"{name} not found"
-        
-        if len(tool.param_spec) == 0:
-            return tool.executor()
 
-        if len(params) != len(tool.param_spec):
-            return f"Invalid number of parameters. The action requires: {len(tool.param_spec)}. Provided: {len(params)}" 
+        requires = self._num_params[name]
+        params = inp.split("|") if requires > 0 else []
 
-            requires = len(tool.param_spec)
-            results = []
+        if len(params) != requires:
+            return f"Invalid number of parameters. The action requires: {requires}. Provided: {len(params)}"
 
-            for i in range(0, len(params), requires):
-                if i + requires > len(params):
-                    break
+        try:
+            cache = get_tool_cache(tool)
 
-                results.append(tool.executor(*params[i:i+requires])) 
+            if cache is None:
+                res = tool.executor(*params)
+            else:
+                key = tool.cache_key(*params) if tool.cache_key is not None else tuple(params)
+                res = cache.get_or_call(key, lambda: tool.executor(*params))
 
-            return results
-        
-        try:
-            res = tool.executor(*params)
-            
             if isinstance(res, list) and self.shuffle_results:
-                random.shuffle(res)
-                
+                # results may be shared through the cache, never shuffle them in place
+                res = random.sample(res, len(res))
+
             return res
 
         except Exception as e:
             traceback.print_exc()
             return "Something went wrong while executing the tool: " + str(e)
-    
+
 class ToolsetComposer(Toolset):
     def __init__(self, toolsets: List[Toolset], *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -80,11 +225,49 @@ class ToolsetComposer(Toolset):
             tool for toolset in self.toolsets
             for tool in toolset.tools
         ]
-        
+
+        # name -> owning toolset, so that each toolset executes its own tools
+        self._toolset_index: Dict[str, Toolset] = {}
+
+        for toolset in self.toolsets:
+            for name in toolset.names:
+                owner = self._toolset_index.get(name)
+
+                if owner is not None:
+                    raise ValueError(
+                        f"Tool {name} is defined in both toolset {owner.TOOLSET_NAME} and {toolset.TOOLSET_NAME}"
+                    )
+
+                self._toolset_index[name] = toolset
+
+        self._build_index()
+
+    def execute(self, name: str, inp: str):
+        toolset = self._toolset_index.get(name)
+
+        if toolset is None:
+            return f"{name} not found"
+
+        return toolset.execute(name, inp)
+
+    def submit(self, name: str, inp: str) -> Future:
+        toolset = self._toolset_index.get(name)
+
+        if toolset is None:
+            future = Future()
+            future.set_result(f"{name} not found")
+            return future
+
+        return toolset.submit(name, inp)
+
+    def execute_many(self, calls: List[Tuple[str, str]]) -> List[Any]:
+        """Executes independent (name, input) calls concurrently, results are in the order of `calls`"""
+        return self.submit_many(calls).result()
+
     def render_instruction(self):
         instruction = ''
-        
+
         for i, e in enumerate(self.toolsets, 1):
             instruction += f'{i}. {e.render_instruction()}\n\n'
 
-        return instruction
\ No newline at end of file
+        return instruction
@@ -0,0 +1,222 @@
+from singleton_decorator import singleton
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from dagent import constant as C
+from dagent.storage import SQLiteURLCache
+from .process_pool import process_pool_enabled, run_cpu_task
+from typing import Dict, Iterable, List, Optional
+import requests
+import threading
+import logging
+import codecs
+import time
+
+logger = logging.getLogger(__name__)
+
+TEXT_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+CHUNK_SIZE = 64 * 1024
+
+class HTMLTextExtractor(HTMLParser):
+    """Incremental html to text, drops script and style elements and stops collecting after `max_chars`"""
+
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+    BLOCK_TAGS = {
+        "p", "div", "br", "li", "ul", "ol", "tr", "table", "section", "article", "header",
+        "footer", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "title"
+    }
+
+    def __init__(self, max_chars: int) -> None:
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self._parts: List[str] = []
+        self._size = 0
+        self._skip_depth = 0
+
+    @property
+    def full(self) -> bool:
+        return self._size >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append("\n")
+
+    def handle_data(self, data):
+        if self._skip_depth > 0 or self.full:
+            return
+
+        self._parts.append(data)
+        self._size += len(data)
+
+    def text(self) -> str:
+        return normalize_text("".join(self._parts))[:self.max_chars]
+
+def normalize_text(text: str) -> str:
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def extract_text(chunks: Iterable[bytes], encoding: str, html: bool=True, max_chars: int=C.CRAWLER_MAX_TEXT_CHARS) -> str:
+    """Decodes and extracts text chunk by chunk, the rest of the stream is not read once `max_chars` is reached"""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    if not html:
+        parts, size = [], 0
+
+        for chunk in chunks:
+            parts.append(decoder.decode(chunk))
+            size += len(parts[-1])
+
+            if size >= max_chars:
+                break
+
+        return normalize_text("".join(parts))[:max_chars]
+
+    parser = HTMLTextExtractor(max_chars)
+
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+
+        if parser.full:
+            break
+
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+
+    return parser.text()
+
+@singleton
+class Crawler(object):
+    """Fetches the text of web pages for the tools. Downloads are streamed and capped,
+    concurrent fetches are bounded per host and results are cached and revalidated with ETag / Last-Modified"""
+
+    def __init__(self,
+                cache_path: str=C.CRAWLER_CACHE_PATH,
+                cache_ttl: float=C.CRAWLER_CACHE_TTL,
+                max_bytes: int=C.CRAWLER_MAX_BYTES,
+                max_chars: int=C.CRAWLER_MAX_TEXT_CHARS,
+                concurrency: int=C.CRAWLER_CONCURRENCY,
+                per_host_limit: int=C.CRAWLER_PER_HOST_LIMIT
+    ) -> None:
+        assert per_host_limit > 0, "per_host_limit must be positive"
+
+        self.cache = SQLiteURLCache(cache_path or ":memory:", C.CRAWLER_CACHE_RETENTION)
+        self.cache_ttl = cache_ttl
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.per_host_limit = per_host_limit
+        self.timeout = (C.CRAWLER_CONNECT_TIMEOUT, C.CRAWLER_READ_TIMEOUT)
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # separated from the tool executor, tools running there wait for these fetches
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dagent-crawler")
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc.lower()
+
+        with self._hosts_lock:
+            sem = self._hosts.get(host)
+
+            if sem is None:
+                sem = self._hosts[host] = threading.BoundedSemaphore(self.per_host_limit)
+
+        return sem
+
+    def _iter_capped(self, response: requests.Response) -> Iterable[bytes]:
+        remaining = self.max_bytes
+
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if remaining <= 0:
+                break
+
+            yield chunk[:remaining]
+            remaining -= len(chunk)
+
+    def _fetch(self, url: str) -> Optional[str]:
+        cached = self.cache.get(url)
+        headers = {}
+
+        if cached is not None:
+            text, etag, last_modified, fetched_at = cached
+
+            if fetched_at + self.cache_ttl > time.time():
+                return text
+
+            if etag:
+                headers["If-None-Match"] = etag
+
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        with self._host_semaphore(url):
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url)
+                    return cached[0]
+
+                if response.status_code != 200:
+                    return None
+
+                content_type = response.headers.get("Content-Type", "text/html")
+                mime = content_type.split(";")[0].strip().lower()
+
+                if mime not in TEXT_CONTENT_TYPES:
+                    logger.info(f"Skipping {url} with content type {mime}")
+                    return None
+
+                # requests falls back to latin-1 for text/* without a charset, pages are mostly utf-8
+                encoding = response.encoding if "charset" in content_type.lower() else "utf-8"
+
+                if mime == "text/plain" or not process_pool_enabled():
+                    text = extract_text(
+                        self._iter_capped(response),
+                        encoding,
+                        html=mime != "text/plain",
+                        max_chars=self.max_chars
+                    )
+
+                else:
+                    # parsing is CPU-bound, keep it off the daemon's GIL. The body is sent in chunks, 
+                    # so that the extractor stops parsing once it has max_chars
+                    chunks = list(self._iter_capped(response))
+                    text = run_cpu_task(
+                        extract_text, chunks, encoding, True, self.max_chars,
+                        timeout=C.PROCESS_POOL_TASK_TIMEOUT
+                    )
+
+                if text:
+                    self.cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+                return text
+
+    def crawl(self, url: str) -> Optional[str]:
+        """Text of the page, None if it is not available as text, empty on failures"""
+        try:
+            return self._fetch(url)
+        except Exception as err:
+            logger.warning(f"Failed to crawl {url}: {err}")
+            return ""
+
+    def crawl_many(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Crawls the distinct urls concurrently"""
+        urls = list(dict.fromkeys(urls))
+        futures = {url: self._executor.submit(self.crawl, url) for url in urls}
+        return {url: future.result() for url, future in futures.items()}
@@ -1,11 +1,17 @@
 import requests
 from dagent.models import TweetObject, TwitterUserObject
 import logging
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Dict, Tuple, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from dagent.utils import formated_utc_time
 from dagent import constant as C
+from dagent.storage import SQLiteCursorStore
+from .x_api import XAPIClient
+from .crawler import Crawler
+import json
 import re
-from bs4 import BeautifulSoup
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +23,15 @@ def _preprocess_twitter_username(username: str) -> str:
 
     return username
 
+def username_cache_key(username: str) -> str:
+    # twitter usernames are case insensitive
+    return _preprocess_twitter_username(username).strip().lower()
+
 def get_user_info_by_username(username: str) -> TwitterUserObject:
     username = _preprocess_twitter_username(username)
 
-    url = f"{C.ETERNAL_X_API}/user/by/username/{username}"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
-    resp = requests.get(url, headers=headers)
+    path = f"/user/by/username/{username}"
+    resp = XAPIClient().get(path)
 
     if resp.status_code != 200:
         logger.error(f"Something went wrong (status code: {resp.status_code})")
@@ -55,17 +62,12 @@ def get_user_info_by_username(username: str) -> TwitterUserObject:
 
 def get_engaged_tweets_by_topic(query: str, top_k=C.DEFAULT_TOP_K) -> List[TweetObject]:
     try:
-        url = f"{C.ETERNAL_X_API}/tweets/search/recent"
+        path = "/tweets/search/recent"
         params = {
             "query": query,
         }
-        headers = {
-            'api-key': C.ETERNAL_X_API_APIKEY
-        }
 
-        resp = requests.get(
-            url, params=params, headers=headers
-        )
+        resp = XAPIClient().get(path, params=params)
 
         if resp.status_code != 200:
             logger.error(f"Something went wrong (status code: {resp.status_code})")
@@ -108,70 +110,100 @@ def get_engaged_tweets_by_topic(query: str, top_k=C.DEFAULT_TOP_K) -> List[Tweet
 
 
 def crawl_data_from_url(url: str):
-    try:
-        # Send a GET request
-        response = requests.get(url)
-        
-        # If the GET request is successful, the status code will be 200
-        if response.status_code == 200:
-            # Get the content of the response
-            page_content = response.content
-            
-            # Create a BeautifulSoup object and specify the parser
-            soup = BeautifulSoup(page_content, 'html.parser')
-            
-            # Remove all script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()  # decompose script and style elements
-            
-            # Get the text from the BeautifulSoup object
-            text = soup.get_text()
-            
-            # Break the text into lines and remove leading and trailing space on each
-            lines = (line.strip() for line in text.splitlines())
-            
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            
-            # Drop blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            return text
-        
-        else:
-            return None
-    
-    except Exception as e:
-        return ""
-        
+    return Crawler().crawl(url)
+
 def get_full_text(full_text: str):
     if "http" in full_text:
         # Extract URLs from full_text
-        urls = re.findall(r'(https?://\S+)', full_text)
-        # Crawl data from each URL and append to full_text
-        for url in urls:
-            crawled_text = crawl_data_from_url(url)
+        urls = list(dict.fromkeys(re.findall(r'(https?://\S+)', full_text)))[:C.CRAWLER_MAX_URLS]
+        # Crawl them concurrently and replace each url by its text
+        for url, crawled_text in Crawler().crawl_many(urls).items():
             if crawled_text:
                 full_text = full_text.replace(url, crawled_text)
     return full_text
     
-def get_tweet_info_from_tweet_id(self, tweet_id: str):
-    try:
-        url = f"{C.ETERNAL_X_API}/tweets"
+_username_cache: "OrderedDict[str, str]" = OrderedDict()
+_username_cache_lock = threading.Lock()
+
+_lookup_executor: Optional[ThreadPoolExecutor] = None
+_lookup_executor_lock = threading.Lock()
+
+def _get_lookup_executor() -> ThreadPoolExecutor:
+    # separated from the tool executor, tools running there wait for these lookups
+    global _lookup_executor
+
+    with _lookup_executor_lock:
+        if _lookup_executor is None:
+            _lookup_executor = ThreadPoolExecutor(
+                max_workers=C.X_API_LOOKUP_CONCURRENCY,
+                thread_name_prefix="dagent-x-lookup"
+            )
+
+    return _lookup_executor
+
+def _cache_username(twitter_id: str, username: str):
+    with _username_cache_lock:
+        _username_cache[twitter_id] = username
+        _username_cache.move_to_end(twitter_id)
+
+        while len(_username_cache) > C.TWITTER_USERNAME_CACHE_SIZE:
+            _username_cache.popitem(last=False)
+
+def _fetch_username(twitter_id: str) -> Optional[str]:
+    resp = XAPIClient().get(f"/user/{twitter_id}")
+
+    if resp.status_code != 200:
+        logger.error(f"Failed to get user {twitter_id} (status code: {resp.status_code})")
+        return None
+
+    username = (resp.json().get("result") or {}).get("username")
+
+    if username:
+        _cache_username(twitter_id, username)
+
+    return username
+
+def resolve_usernames(twitter_ids: List[str]) -> Dict[str, str]:
+    """Maps twitter ids to usernames, from the per-process cache or with one concurrent lookup per unknown id"""
+    usernames, missing = {}, []
+
+    with _username_cache_lock:
+        for twitter_id in dict.fromkeys(twitter_ids):
+            if twitter_id in _username_cache:
+                _username_cache.move_to_end(twitter_id)
+                usernames[twitter_id] = _username_cache[twitter_id]
+            else:
+                missing.append(twitter_id)
+
+    if len(missing) == 1:
+        usernames[missing[0]] = _fetch_username(missing[0])
+    elif len(missing) > 1:
+        usernames.update(zip(missing, _get_lookup_executor().map(_fetch_username, missing)))
+
+    return {k: v for k, v in usernames.items() if v is not None}
+
+def _get_parent_tweet_id(tweet: dict) -> Optional[str]:
+    reference_tweets = tweet.get("referenced_tweets") or []
+    return next((ref_tweet["id"] for ref_tweet in reference_tweets if ref_tweet["type"] == "replied_to"), None)
+
+def lookup_tweets(tweet_ids: List[str]) -> Dict[str, dict]:
+    """Fetches tweets with batched `GET /tweets?ids=` calls; maps each found id to its tweet_object and parent_tweet_id"""
+    ids = list(dict.fromkeys(tweet_ids))
+    found = {}
+
+    for i in range(0, len(ids), C.X_API_MAX_IDS_PER_REQUEST):
         params = {
-            "ids": tweet_id
+            "ids": ",".join(ids[i:i + C.X_API_MAX_IDS_PER_REQUEST])
         }
-        headers = {
-            'api-key': C.ETERNAL_X_API_APIKEY
-        }
-        resp = requests.get(
-            url, headers=headers, params=params
-        )
+        resp = XAPIClient().get("/tweets", params=params)
         resp.raise_for_status()
-        result = resp.json().get("result", {})
+        result = resp.json().get("result") or {}
+
         for key, value in result.items():
             tweet = value["Tweet"]
             user = value["User"]
+            _cache_username(user["id"], user["username"])
+
             tweet_object = TweetObject(
                 tweet_id=tweet["id"],
                 twitter_username=user["username"],
@@ -181,42 +213,70 @@ def get_tweet_info_from_tweet_id(self, tweet_id: str):
             )
             parent_tweet_id = None
             if key != tweet["conversation_id"]:
-                reference_tweets = [] if tweet["referenced_tweets"] is None else tweet["referenced_tweets"]
-                parent_tweet_id = next((ref_tweet["id"] for ref_tweet in reference_tweets if ref_tweet["type"] == "replied_to"), None)
-            return {
+                parent_tweet_id = _get_parent_tweet_id(tweet)
+
+            found[key] = {
                 "tweet_object": tweet_object,
                 "parent_tweet_id": parent_tweet_id
             }
+
+    return found
+
+def get_tweet_info_from_tweet_id(tweet_id: str):
+    try:
+        info = lookup_tweets([tweet_id]).get(tweet_id)
+
+        if info is not None:
+            return info
     except Exception as e:
         logger.error(f"An error occurred: {e}")
-        return {
-            "tweet_object": None,
-            "parent_tweet_id": None
-        }
-    
+
+    return {
+        "tweet_object": None,
+        "parent_tweet_id": None
+    }
+
+def get_full_contexts(roots: List[Tuple[Any, Optional[str]]]) -> List[list]:
+    """Resolves the ancestors of several (tweet, parent_tweet_id) at once, with one batched lookup per thread depth"""
+    threads = [[tweet_object] for tweet_object, _ in roots]
+    frontier = {
+        i: parent_tweet_id
+        for i, (_, parent_tweet_id) in enumerate(roots)
+        if parent_tweet_id is not None
+    }
+
+    while len(frontier) > 0:
+        found = lookup_tweets(list(frontier.values()))
+        next_frontier = {}
+
+        for i, parent_tweet_id in frontier.items():
+            info = found.get(parent_tweet_id)
+
+            if info is None:
+                logger.warning(f"Tweet {parent_tweet_id} not found")
+                continue
+
+            tweet_object = info["tweet_object"]
+            tweet_object.full_text = get_full_text(tweet_object.full_text)
+            threads[i].insert(0, tweet_object)
+
+            if info["parent_tweet_id"] is not None and len(threads[i]) < C.MAX_THREAD_DEPTH:
+                next_frontier[i] = info["parent_tweet_id"]
+
+        frontier = next_frontier
+
+    return threads
+
 def get_full_context_from_a_tweet(tweet_object, parent_tweet_id: str = None):
-    tweets = [tweet_object]
-    while parent_tweet_id is not None:
-        tweet_info = get_tweet_info_from_tweet_id(parent_tweet_id)
-        tweet_object = tweet_info["tweet_object"]
-        parent_tweet_id = tweet_info["parent_tweet_id"]
-        full_text = get_full_text(tweet_object.full_text)
-        tweet_object["full_text"] = full_text
-        tweets.insert(0, tweet_object)
-    return tweets
+    return get_full_contexts([(tweet_object, parent_tweet_id)])[0]
 
 def get_tweets_by_username_v2(username: str, num_tweets = 1, replied = 0):
     try:
-        url = f"{C.ETERNAL_X_API}/tweets/by/username/{username}"
-        headers = {
-            'api-key': C.ETERNAL_X_API_APIKEY
-        }
+        path = f"/tweets/by/username/{username}"
         params = {
             "replied": replied
         }
-        resp = requests.get(
-            url, headers=headers, params=params
-        )
+        resp = XAPIClient().get(path, params=params)
         
         if resp.status_code != 200:
             return f"Something went wrong (status code: {resp.status_code})"
@@ -226,43 +286,30 @@ def get_tweets_by_username_v2(username: str, num_tweets = 1, replied = 0):
             return "Error occurred when calling API: " + resp["error"]["message"]
         
         tweets = resp["result"]["data"][:num_tweets]
-        res = []
+        usernames = resolve_usernames([tweet["author_id"] for tweet in tweets])
+        roots = []
         for tweet in tweets:
-            reference_tweets = [] if tweet["referenced_tweets"] is None else tweet["referenced_tweets"]
-            reference_tweets = {}
-            parent_tweet_id = next((ref_tweet["id"] for ref_tweet in reference_tweets if ref_tweet["type"] == "replied_to"), None)
             author_id = tweet["author_id"]
-            user_url = f"{C.ETERNAL_X_API}/user/{author_id}"
-            user_resp = requests.get(user_url, headers=headers)
-            user_resp_json = user_resp.json()
-            username = user_resp_json["result"]["username"]
             full_text = get_full_text(tweet["text"])
             tweet_object = TweetObject(
                 tweet_id=tweet["id"],
-                twitter_username=username,
+                twitter_username=usernames.get(author_id),
                 twitter_id=author_id,
                 full_text=full_text,
                 posted_at=tweet["created_at"],
             )
-            if parent_tweet_id is not None:
-                all_tweets = get_full_context_from_a_tweet(tweet_object, parent_tweet_id)
-                res.append(all_tweets)
-            else:
-                res.append([tweet_object])
-        return res
+            roots.append((tweet_object, _get_parent_tweet_id(tweet)))
+        return get_full_contexts(roots)
     except Exception as e:
         return []
     
 def get_recent_mentioned_tweets_by_username_v2(username: str, num_tweets=1, replied=0):
     try:
-        url = f"{C.ETERNAL_X_API}/user/by/username/{username}/mentions"
-        headers = {
-            'api-key': C.ETERNAL_X_API_APIKEY
-        }
+        path = f"/user/by/username/{username}/mentions"
         params = {
             "replied": replied
         }
-        resp = requests.get(url, headers=headers, params=params)
+        resp = XAPIClient().get(path, params=params)
 
         if resp.status_code != 200:
             return f"Something went wrong (status code: {resp.status_code})"
@@ -275,47 +322,33 @@ def get_recent_mentioned_tweets_by_username_v2(username: str, num_tweets=1, repl
         if not tweets:
             return "No tweets found"
 
-        res = []
+        usernames = resolve_usernames([tweet["author_id"] for tweet in tweets])
+        roots = []
         for tweet in tweets:
-            reference_tweets = [] if tweet["referenced_tweets"] is None else tweet["referenced_tweets"]
-            reference_tweets = {}
-            parent_tweet_id = next((ref_tweet["id"] for ref_tweet in reference_tweets if ref_tweet["type"] == "replied_to"), None)
             author_id = tweet["author_id"]
-            user_url =f"{C.ETERNAL_X_API}/user/{author_id}"
-            user_resp = requests.get(user_url, headers=headers)
-            user_resp_json = user_resp.json()
-            username = user_resp_json["result"]["username"]
             full_text = get_full_text(tweet["text"])
             tweet_object = {
                 "twitter_id": author_id,
                 "tweet_id": tweet["id"],
-                "twitter_username": username,
+                "twitter_username": usernames.get(author_id),
                 "full_text": full_text,
                 "posted_at": tweet["created_at"]
             }
-            if parent_tweet_id is not None:
-                all_tweets = get_full_context_from_a_tweet(tweet_object, parent_tweet_id)
-                res.append(all_tweets)
-            else:
-                res.append([tweet_object])
-        return res
+            roots.append((tweet_object, _get_parent_tweet_id(tweet)))
+        return get_full_contexts(roots)
     except Exception as e:
         return f"An error occurred: {str(e)}"
 
 def find_user(query: str, top_k=C.DEFAULT_TOP_K) -> List[TwitterUserObject]:
 
-    url = f"{C.ETERNAL_X_API}/user/search/"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
+    path = "/user/search/"
     params = {
         "query": query,
     }
 
-    resp = requests.get(
-        url, 
-        params=params,
-        headers=headers
+    resp = XAPIClient().get(
+        path,
+        params=params
     )
 
     if resp.status_code != 200:
@@ -347,11 +380,8 @@ def find_user(query: str, top_k=C.DEFAULT_TOP_K) -> List[TwitterUserObject]:
 
 def get_recent_mentioned_tweets(username: str, top_k=C.DEFAULT_TOP_K) -> List[TweetObject]:
         username = _preprocess_twitter_username(username)
-        url = f"{C.ETERNAL_X_API}/user/by/username/{username}/mentions"
-        headers = {
-            'api-key': C.ETERNAL_X_API_APIKEY
-        }
-        resp = requests.get(url, headers=headers)
+        path = f"/user/by/username/{username}/mentions"
+        resp = XAPIClient().get(path)
         
         if resp.status_code != 200:
             logger.error(f"Something went wrong (status code: {resp.status_code})")
@@ -386,14 +416,86 @@ def get_recent_mentioned_tweets(username: str, top_k=C.DEFAULT_TOP_K) -> List[Tw
         
         return tweets
 
+_mention_cursors: Optional[SQLiteCursorStore] = None
+_mention_cursors_lock = threading.Lock()
+
+def _get_mention_cursors() -> SQLiteCursorStore:
+    global _mention_cursors
+
+    with _mention_cursors_lock:
+        if _mention_cursors is None:
+            _mention_cursors = SQLiteCursorStore(
+                C.TWITTER_CURSOR_PATH or ":memory:", 
+                C.TWITTER_CURSOR_RETENTION,
+                C.TWITTER_MENTION_LEASE,
+                C.TWITTER_MENTION_MAX_ATTEMPTS
+            )
+
+    return _mention_cursors
+
+def get_new_mentioned_tweets(username: str, top_k=C.DEFAULT_TOP_K) -> List[TweetObject]:
+    """Mentions not returned before. The first call starts from the most recent ones, 
+    later calls only fetch mentions after the persisted since_id and return the oldest first"""
+    username = _preprocess_twitter_username(username)
+    key = username.lower()
+    cursors = _get_mention_cursors()
+    since_id = cursors.get_cursor(key)
+
+    path = f"/user/by/username/{username}/mentions"
+    params = {
+        "since_id": since_id
+    } if since_id is not None else {}
+    resp = XAPIClient().get(path, params=params)
+
+    if resp.status_code != 200:
+        logger.error(f"Something went wrong (status code: {resp.status_code})")
+        return []
+
+    resp: dict = resp.json()
+
+    if resp.get("error") is not None:
+        err: dict = resp["error"]
+        logger.error(f"Error occured when calling api: {err.get('message')}")
+        return []
+
+    tweets = resp["result"]["data"] or []
+    tweets = sorted(tweets, key=lambda x: int(x["id"]), reverse=since_id is None)
+
+    if since_id is not None:
+        # in case the api ignores since_id
+        tweets = [x for x in tweets if int(x["id"]) > since_id]
+
+    # the mentions stay claimed until they are replied to (or quoted), otherwise they are returned again.
+    # claiming without new mentions still returns those whose lease expired
+    claimed = cursors.claim(key, [(x["id"], json.dumps(x)) for x in tweets], limit=top_k)
+    claimed = [json.loads(payload) for _, payload in claimed]
+
+    if len(tweets) > 0:
+        # mentions older than the ones returned by the first call are skipped for good
+        high_water_mark = max(int(x["id"]) for x in tweets) if since_id is None \
+            else max((int(x["id"]) for x in claimed), default=since_id)
+        cursors.advance_cursor(key, high_water_mark)
+
+    return [
+        TweetObject(
+            tweet_id=x["id"],
+            twitter_username=username,
+            twitter_id=x["author_id"],
+            like_count=x["public_metrics"]["like_count"],
+            retweet_count=x["public_metrics"]["retweet_count"],
+            reply_count=x["public_metrics"]["reply_count"],
+            impression_count=x["public_metrics"]["impression_count"],
+            full_text=x["text"],
+            posted_at=x["created_at"],
+        )
+        for x in claimed
+    ]
+
 def get_tweets_by_username(username: str, top_k=C.DEFAULT_TOP_K) -> List[TweetObject]:
     username = _preprocess_twitter_username(username)
 
-    url = f"{C.ETERNAL_X_API}/tweets/by/username/{username}"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
-    resp = requests.get(url, headers=headers)
+    path = f"/tweets/by/username/{username}"
+    resp = XAPIClient().get(path)
     
     if resp.status_code != 200:
         logger.error(f"Something went wrong (status code: {resp.status_code})")
@@ -431,11 +533,8 @@ def get_tweets_by_username(username: str, top_k=C.DEFAULT_TOP_K) -> List[TweetOb
 def get_following_users_by_username(username: str, top_k: int=20, only_name=True) -> Union[List[TwitterUserObject], str]:
     username = _preprocess_twitter_username(username)
 
-    url = f"{C.ETERNAL_X_API}/user/by/username/{username}/following"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
-    resp = requests.get(url, headers=headers)
+    path = f"/user/by/username/{username}/following"
+    resp = XAPIClient().get(path)
 
     if resp.status_code != 200:
         logger.error(f"Something went wrong (status code: {resp.status_code})")
@@ -470,22 +569,35 @@ def get_following_users_by_username(username: str, top_k: int=20, only_name=True
     usernames = list(map(lambda x: x["screen_name"], followings))
     return str(", ".join(usernames))
 
-def _perform_twitter_action_and_get_result(url: str, headers: dict, payload: dict) -> str:
+def _perform_twitter_action(path: str, payload: dict) -> Tuple[bool, Union[dict, str]]:
+    """(whether the action succeeded, its result)"""
     payload["is_testing"] = C.IS_SANDBOX
-    response = requests.post(url, headers=headers, json=payload)
+    response = XAPIClient().post(path, json=payload)
     
     if response.status_code != 200:
-        return f"Request failed with status code: {response.status_code} - {response.text}"
+        return False, f"Request failed with status code: {response.status_code} - {response.text}"
     
     try:
         data = response.json()
     except ValueError:
-        return "Failed to parse response as JSON; But the request was successful; Raw response: " + response.text
+        return True, "Failed to parse response as JSON; But the request was successful; Raw response: " + response.text
 
     if data.get("error") is not None:
-        return f"API Error: {data['error']}"
+        return False, f"API Error: {data['error']}"
+
+    return True, data
+
+def _perform_twitter_action_and_get_result(path: str, payload: dict) -> str:
+    return _perform_twitter_action(path, payload)[1]
 
-    return data
+def _perform_mention_action_and_get_result(tweet_id: str, path: str, payload: dict) -> str:
+    succeeded, result = _perform_twitter_action(path, payload)
+
+    if succeeded:
+        # a claimed mention is handled once it is answered
+        _get_mention_cursors().complete(tweet_id)
+
+    return result
 
 def follow(target_username: str):
     action_input = {
@@ -497,14 +609,10 @@ def follow(target_username: str):
         'action_input': action_input
     }
     
-    url = f"{C.ETERNAL_X_API}/user/action"
+    path = "/user/action"
 
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": C.ETERNAL_X_API_APIKEY
-    }
     
-    return _perform_twitter_action_and_get_result(url, headers, payload)
+    return _perform_twitter_action_and_get_result(path, payload)
 
 def reply(tweet_id: str, reply_content: str):
     action_input = {
@@ -517,14 +625,10 @@ def reply(tweet_id: str, reply_content: str):
         'action_input': action_input
     }
 
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": C.ETERNAL_X_API_APIKEY
-    }
 
-    url = f"{C.ETERNAL_X_API}/user/action" 
+    path = "/user/action" 
     
-    return _perform_twitter_action_and_get_result(url, headers, payload)
+    return _perform_mention_action_and_get_result(tweet_id, path, payload)
    
 def quote_tweet(tweet_id: str, comment: str):
     action_input = {
@@ -537,14 +641,10 @@ def quote_tweet(tweet_id: str, comment: str):
         'action_input': action_input
     }
     
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": C.ETERNAL_X_API_APIKEY
-    }
     
-    url = f"{C.ETERNAL_X_API}/user/action"
+    path = "/user/action"
     
-    return _perform_twitter_action_and_get_result(url, headers, payload)
+    return _perform_mention_action_and_get_result(tweet_id, path, payload)
 
 def tweet(content: str):
     action_input = {
@@ -556,14 +656,10 @@ def tweet(content: str):
         'action_input': action_input
     }
     
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": C.ETERNAL_X_API_APIKEY
-    }
     
-    url = f"{C.ETERNAL_X_API}/user/action"
+    path = "/user/action"
     
-    return _perform_twitter_action_and_get_result(url, headers, payload)
+    return _perform_twitter_action_and_get_result(path, payload)
 
 
 TOKENS_INFO: list = [
@@ -625,20 +721,16 @@ def buy(chain_id: int, agent_contract_id: str, symbol: str, amount: str):
     if mint_addr is None:
         return f"Invalid symbol {symbol}. Symbol must be one of {', '.join(tradable_symbols())}"
 
-    url = f"{C.ETERNAL_X_API}/wallet/raydium/trade-token/{chain_id}/{agent_contract_id}"
+    path = f"/wallet/raydium/trade-token/{chain_id}/{agent_contract_id}"
     payload = {
         "action": "buy",
         "mint": symbol2mintaddr(symbol),
         "amount": amount
     }
     
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
     
-    resp = requests.post(
-        url, 
-        headers=headers, 
+    resp = XAPIClient().post(
+        path,
         json=payload
     )
     
@@ -667,20 +759,16 @@ def sell(chain_id: int, agent_contract_id: str, symbol: str, amount: str):
     if mint_addr is None:
         return f"Invalid symbol {symbol}. Symbol must be one of {', '.join(tradable_symbols())}"
 
-    url = f"{C.ETERNAL_X_API}/wallet/raydium/trade-token/{chain_id}/{agent_contract_id}"
+    path = f"/wallet/raydium/trade-token/{chain_id}/{agent_contract_id}"
     payload = {
         "action": "sell",
         "mint": symbol2mintaddr(symbol),
         "amount": amount
     }
     
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
 
-    resp = requests.post(
-        url, 
-        headers=headers, 
+    resp = XAPIClient().post(
+        path,
         json=payload
     )
 
@@ -695,11 +783,8 @@ def sell(chain_id: int, agent_contract_id: str, symbol: str, amount: str):
     return f"Sold {amount} token {symbol}"
 
 def get_wallet_balance(chain_id: int, agent_contract_id: str):
-    url = f"{C.ETERNAL_X_API}/wallet/solana/balances/{chain_id}/{agent_contract_id}"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
-    resp = requests.get(url, headers=headers)
+    path = f"/wallet/solana/balances/{chain_id}/{agent_contract_id}"
+    resp = XAPIClient().get(path)
 
     if resp.status_code != 200:
         return f"Failed to get wallet balance. Status code: {resp.status_code}."
@@ -731,11 +816,8 @@ def get_token_price(symbol: str):
     if mint_address is None:
         return f"Invalid symbol {symbol}. Symbol must be one of {', '.join(tradable_symbols())}"
     
-    url = f"{C.ETERNAL_X_API}/wallet/pumfun/price/{mint_address}"
-    headers = {
-        'api-key': C.ETERNAL_X_API_APIKEY
-    }
-    resp = requests.get(url, headers=headers)
+    path = f"/wallet/pumfun/price/{mint_address}"
+    resp = XAPIClient().get(path)
     
     if resp.status_code != 200:
         return f"Failed to get price for token {symbol}. Status code: {resp.status_code}."
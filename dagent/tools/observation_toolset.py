@@ -0,0 +1,82 @@
+from typing import List, Optional
+from dagent.models import Tool, ToolParam, ToolParamDtype
+from dagent.registry import RegistryCategory, register_decorator
+from dagent.storage import SQLiteObservationStore
+from dagent import constant as C
+from .base_toolset import Toolset
+import threading
+import math
+
+_observation_store: Optional[SQLiteObservationStore] = None
+_observation_store_lock = threading.Lock()
+
+def get_observation_store() -> SQLiteObservationStore:
+    global _observation_store
+
+    with _observation_store_lock:
+        if _observation_store is None:
+            _observation_store = SQLiteObservationStore(
+                C.OBSERVATION_STORE_PATH or ":memory:", C.OBSERVATION_STORE_RETENTION
+            )
+
+    return _observation_store
+
+def budget_observation(observation: str, max_chars: int=C.OBSERVATION_MAX_CHARS) -> str:
+    """Observations longer than `max_chars` are stored out of band and replaced by a preview and their handle"""
+    if max_chars <= 0 or len(observation) <= max_chars:
+        return observation
+
+    handle = get_observation_store().put(observation)
+    num_pages = math.ceil(len(observation) / C.OBSERVATION_PAGE_CHARS)
+    preview = observation[:min(C.OBSERVATION_PREVIEW_CHARS, max_chars)]
+
+    return (
+        f"{preview}\n[truncated, {len(observation)} characters in total. "
+        f"Use read_observation with action_input {handle}|<page> to read pages 1 to {num_pages}]"
+    )
+
+def read_observation(handle: str, page: str) -> str:
+    content = get_observation_store().get(handle.strip())
+
+    if content is None:
+        return f"Observation {handle} not found, it may have expired"
+
+    try:
+        page = int(page.strip())
+    except ValueError:
+        return f"Invalid page {page}, expected a number"
+
+    num_pages = math.ceil(len(content) / C.OBSERVATION_PAGE_CHARS)
+
+    if page < 1 or page > num_pages:
+        return f"Invalid page {page}, the observation has {num_pages} pages"
+
+    start = (page - 1) * C.OBSERVATION_PAGE_CHARS
+    return f"[page {page} of {num_pages}]\n" + content[start:start + C.OBSERVATION_PAGE_CHARS]
+
+@register_decorator(RegistryCategory.ToolSet)
+class ObservationToolset(Toolset):
+    TOOLSET_NAME = "observation"
+    PURPOSE = "to read observations which were truncated"
+    SHAREABLE = True
+
+    TOOLS: List[Tool] = [
+        Tool(
+            name="read_observation",
+            description="Read a page of a truncated observation",
+            param_spec=[
+                ToolParam(
+                    name="handle",
+                    dtype=ToolParamDtype.STRING,
+                    description="Handle of the truncated observation"
+                ),
+                ToolParam(
+                    name="page",
+                    dtype=ToolParamDtype.NUMBER,
+                    description="Page to read, starting from 1"
+                )
+            ],
+            executor=read_observation,
+            idempotent=True
+        )
+    ]
@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor, Future, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dagent import constant as C
+from typing import Any, Callable, Optional
+import multiprocessing
+import threading
+import logging
+import signal
+import time
+import sys
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(1, C.PROCESS_POOL_MAX_PENDING))
+
+def _limit_memory(max_bytes: int):
+    # runs in each worker, a page blowing up the parser fails with MemoryError instead of growing the process
+    try:
+        import resource
+    except ImportError:
+        return
+
+    if max_bytes > 0:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, max_bytes))
+
+def _call_with_deadline(seconds: Optional[float], fn: Callable, *args) -> Any:
+    # runs in a worker, a task running past its deadline interrupts itself instead of its worker being killed,
+    # which would break the pool and fail the tasks of the other workers
+    if seconds is None or not hasattr(signal, "setitimer"):
+        return fn(*args)
+
+    def expire(signum, frame):
+        raise TimeoutError(f"Process pool task exceeded its deadline of {seconds} seconds")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 0.001))
+
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def process_pool_enabled() -> bool:
+    return C.PROCESS_POOL_WORKERS > 0
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared pool running CPU-heavy post-processing of the tools (e.g. html extraction) off the daemon's GIL"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            kwargs = {}
+
+            if sys.version_info >= (3, 11):
+                kwargs["max_tasks_per_child"] = C.PROCESS_POOL_MAX_TASKS_PER_CHILD
+
+            # spawn, forking the multi-threaded daemon is not safe
+            _pool = ProcessPoolExecutor(
+                max_workers=C.PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_memory,
+                initargs=(C.PROCESS_POOL_WORKER_MAX_MEMORY,),
+                **kwargs
+            )
+
+    return _pool
+
+def _reset_process_pool(broken: ProcessPoolExecutor):
+    global _pool
+
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+
+    broken.shutdown(wait=False, cancel_futures=True)
+
+def submit_cpu_task(fn: Callable, *args, timeout: Optional[float]=None) -> Future:
+    """Runs `fn(*args)` in the process pool, or inline when the pool is disabled.
+    `fn` and its arguments must be picklable. Blocks while PROCESS_POOL_MAX_PENDING tasks are in flight.
+    `timeout` bounds the wait for a slot (TimeoutError) and then the run of the task in its worker"""
+    if not process_pool_enabled():
+        future = Future()
+
+        try:
+            future.set_result(fn(*args))
+        except Exception as err:
+            future.set_exception(err)
+
+        return future
+
+    started_at = time.monotonic()
+
+    if not _slots.acquire(timeout=timeout if timeout is not None else -1):
+        raise TimeoutError(f"No process pool slot available after {timeout} seconds")
+
+    remaining = timeout - (time.monotonic() - started_at) if timeout is not None else None
+
+    try:
+        pool = get_process_pool()
+
+        try:
+            future = pool.submit(_call_with_deadline, remaining, fn, *args)
+        except BrokenProcessPool:
+            # broken by an earlier task whose callback has not reset it yet
+            _reset_process_pool(pool)
+            pool = get_process_pool()
+            future = pool.submit(_call_with_deadline, remaining, fn, *args)
+
+    except BaseException:
+        _slots.release()
+        raise
+
+    def on_done(f: Future):
+        _slots.release()
+
+        # a worker killed by the os breaks the whole pool, the next task starts a new one
+        if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool):
+            logger.warning("Process pool is broken, restarting it")
+            _reset_process_pool(pool)
+
+    future.add_done_callback(on_done)
+    return future
+
+def run_cpu_task(fn: Callable, *args, timeout: Optional[float]=None) -> Any:
+    """Like submit_cpu_task, waiting at most `timeout` seconds in total"""
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    future = submit_cpu_task(fn, *args, timeout=timeout)
+
+    try:
+        return future.result(timeout=max(0, deadline - time.monotonic()) if deadline is not None else None)
+    except TimeoutError:
+        # a queued task is dropped, a running one stops at its own deadline and frees its slot
+        future.cancel()
+        raise
@@ -21,7 +21,7 @@ def wiki_search(query: str, lang="en", top_k=20) -> List[str]:
         'limit': top_k
     }
     
-    resp = requests.get(url, headers=headers, params=params)
+    resp = requests.get(url, headers=headers, params=params, timeout=(C.WIKI_CONNECT_TIMEOUT, C.WIKI_READ_TIMEOUT))
     resp_json = resp.json()
     
     pages = resp_json.get("pages", [])
@@ -40,6 +40,7 @@ def wiki_search(query: str, lang="en", top_k=20) -> List[str]:
 class WikipediaSearch(Toolset):
     TOOLSET_NAME = "Wikipedia search"
     PURPOSE = "to retrieve data from Wikipedia"
+    SHAREABLE = True
 
     TOOLS: List[Tool] = [
         Tool(
@@ -52,6 +53,7 @@ class WikipediaSearch(Toolset):
                     description="Query to search"
                 )
             ],
-            executor=lambda query: wiki_search(query)
+            executor=lambda query: wiki_search(query),
+            idempotent=True
         )
     ]
\ No newline at end of file
@@ -0,0 +1,103 @@
+from dagent.models import Tool
+from concurrent.futures import Future
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+class ToolResultCache(object):
+    """TTL + LRU cache of a tool's results. Concurrent calls with the same key share one execution (singleflight)"""
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._evictions = 0
+
+    def get_or_call(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+
+            if leader:
+                inflight = self._inflight[key] = Future()
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            return inflight.result()
+
+        try:
+            value = fn()
+        except BaseException as err:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+            inflight.set_exception(err)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+
+            # failures are reported as empty results by most tools, never keep them
+            if value:
+                self._entries[key] = (time.time() + self.ttl, value)
+                self._entries.move_to_end(key)
+
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+
+        inflight.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "shared": self._shared,
+                "evictions": self._evictions
+            }
+
+# tools are declared once per toolset class, so their caches are process-wide
+_caches: Dict[int, Tuple[str, ToolResultCache]] = {}
+_caches_lock = threading.Lock()
+
+def get_tool_cache(tool: Tool) -> Optional[ToolResultCache]:
+    if tool.cache_ttl is None:
+        return None
+
+    with _caches_lock:
+        entry = _caches.get(id(tool))
+
+        if entry is None:
+            entry = _caches[id(tool)] = (tool.name, ToolResultCache(tool.cache_ttl, tool.cache_max_size))
+
+    return entry[1]
+
+def tool_cache_stats() -> Dict[str, dict]:
+    with _caches_lock:
+        caches = list(_caches.values())
+
+    return {name: cache.stats() for name, cache in caches}
@@ -10,6 +10,7 @@ from dagent import constant as C
 class TradingToolset(Toolset):
     TOOLSET_NAME = "trading"
     PURPOSE = f"to buy, sell, and get information about tokens (tradable tokens: {functional.tradable_symbols()})"
+    SHAREABLE = True
 
     TOOLS: List[Tool] = [
         Tool(
@@ -50,7 +51,8 @@ class TradingToolset(Toolset):
             name="get_wallet_balance",
             description="Get wallet balance", 
             param_spec=[],
-            executor=lambda: functional.get_wallet_balance(C.CHAIN_ID, C.CONTRACT_ID)
+            executor=lambda: functional.get_wallet_balance(C.CHAIN_ID, C.CONTRACT_ID),
+            idempotent=True
         ),
         Tool(
             name="get_token_price",
@@ -62,6 +64,7 @@ class TradingToolset(Toolset):
                     description="The symbol of the token"
                 )
             ],
-            executor=functional.get_token_price
+            executor=functional.get_token_price,
+            idempotent=True
         )
     ]
\ No newline at end of file
@@ -3,11 +3,13 @@ from dagent.models import Tool, ToolParam, ToolParamDtype
 from dagent.registry import RegistryCategory, register_decorator
 from . base_toolset import Toolset
 from . import functional
+from dagent import constant as C
 
 @register_decorator(RegistryCategory.ToolSet)
 class TwitterToolset(Toolset):
     TOOLSET_NAME = "twitter"
     PURPOSE = "to interact with Twitter API"
+    SHAREABLE = True
 
     TOOLS: List[Tool] = [
         Tool(
@@ -20,7 +22,9 @@ class TwitterToolset(Toolset):
                     description="Twitter username to get info"
                 )
             ],
-            executor=functional.get_user_info_by_username
+            executor=functional.get_user_info_by_username,
+            cache_ttl=C.TWITTER_TOOL_CACHE_TTL,
+            cache_key=functional.username_cache_key
         ),
         Tool(
             name="get_engaged_tweets_by_topic",
@@ -32,7 +36,9 @@ class TwitterToolset(Toolset):
                     description="Topic to search"
                 )
             ],
-            executor=functional.get_engaged_tweets_by_topic
+            executor=functional.get_engaged_tweets_by_topic,
+            cache_ttl=C.TWITTER_TOOL_CACHE_TTL,
+            cache_key=lambda topic: topic.strip().lower()
         ),
         Tool(
             name="find_user",
@@ -44,7 +50,8 @@ class TwitterToolset(Toolset):
                     description="Query to search"
                 )
             ],
-            executor=functional.find_user
+            executor=functional.find_user,
+            idempotent=True
         ),
         Tool(
             name="get_recent_mentioned_tweets",
@@ -56,7 +63,21 @@ class TwitterToolset(Toolset):
                     description="Username to search"
                 )
             ],
-            executor=functional.get_recent_mentioned_tweets
+            executor=functional.get_recent_mentioned_tweets,
+            cache_ttl=C.TWITTER_TOOL_CACHE_TTL,
+            cache_key=functional.username_cache_key
+        ),
+        Tool(
+            name="get_new_mentioned_tweets",
+            description="Get tweets mentioning a specific user which have not been returned before",
+            param_spec=[
+                ToolParam(
+                    name="username",
+                    dtype=ToolParamDtype.STRING,
+                    description="Username to search"
+                )
+            ],
+            executor=functional.get_new_mentioned_tweets
         ),
         Tool(
             name="get_tweets_by_username",
@@ -68,7 +89,8 @@ class TwitterToolset(Toolset):
                     description="Username to search"
                 )
             ],
-            executor=functional.get_tweets_by_username
+            executor=functional.get_tweets_by_username,
+            idempotent=True
         ),
         Tool(
             name="get_following_users_by_username",
@@ -80,7 +102,9 @@ class TwitterToolset(Toolset):
                     description="Username to search"
                 )
             ],
-            executor=functional.get_following_users_by_username
+            executor=functional.get_following_users_by_username,
+            cache_ttl=C.TWITTER_TOOL_CACHE_TTL,
+            cache_key=functional.username_cache_key
         ),
         Tool(
             name="follow",
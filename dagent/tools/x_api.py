@@ -0,0 +1,106 @@
+from singleton_decorator import singleton
+from email.utils import parsedate_to_datetime
+from dagent import constant as C
+from typing import Optional, Tuple
+import datetime
+import requests
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+@singleton
+class XAPIClient(object):
+    """Keep-alive client of ETERNAL_X_API shared by all tools, with default timeouts and retries of idempotent requests"""
+
+    def __init__(self,
+                base_url: Optional[str]=C.ETERNAL_X_API,
+                api_key: Optional[str]=C.ETERNAL_X_API_APIKEY,
+                timeout: Tuple[float, float]=(C.X_API_CONNECT_TIMEOUT, C.X_API_TIMEOUT),
+                max_retries: int=C.X_API_MAX_RETRIES,
+                pool_size: int=C.X_API_POOL_SIZE
+    ) -> None:
+        # ETERNAL_X_API may be unset when the X tools are not used, fail on the first request instead
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+
+        if api_key is not None:
+            self.session.headers.update({"api-key": api_key})
+
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size
+        )
+
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter
+        return random.uniform(0, min(C.X_API_MAX_BACKOFF, C.X_API_BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self, method: str, path: str, retry: Optional[bool]=None, **kwargs) -> requests.Response:
+        """`path` is relative to the api base url. Only GET requests are retried by default,
+        actions like tweeting or trading must not be sent twice"""
+        if self.base_url is None:
+            raise ValueError("ETERNAL_X_API is not set, the X API can not be reached")
+
+        url = self.base_url + path
+        kwargs.setdefault("timeout", self.timeout)
+        retry = method.upper() == "GET" if retry is None else retry
+        attempts = self.max_retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if last:
+                    raise
+
+                delay = self._backoff(attempt)
+                logger.warning(f"Request to {path} failed ({err}), retrying in {delay:.2f}s")
+
+            else:
+                if last or resp.status_code not in RETRY_STATUS_CODES:
+                    return resp
+
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                delay = min(retry_after, C.X_API_MAX_BACKOFF) if retry_after is not None else self._backoff(attempt)
+                logger.warning(f"Request to {path} returned {resp.status_code}, retrying in {delay:.2f}s")
+
+                resp.close()
+
+            time.sleep(delay)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
@@ -1,9 +1,18 @@
 import datetime 
 import os
-from typing import Optional
+import json
+from typing import Optional, Callable, Dict, List
 import logging
-from .models import InferenceResult
-import queue
+from .models import InferenceResult, InferenceState
+from . import constant as C
+from .storage import SQLiteResultStore
+from collections import OrderedDict
+import threading
+import time
+import asyncio
+import heapq
+import itertools
+from concurrent.futures import Future
 from singleton_decorator import singleton
 
 logger = logging.getLogger(__name__)
@@ -14,26 +23,290 @@ def formated_utc_time():
 def get_script_dir(ee = __file__):
     return os.path.dirname(os.path.realpath(ee))
 
+def extract_json_object(text: str) -> Optional[dict]:
+    """Returns the first JSON object found in `text`, tolerating any text around it"""
+    try:
+        obj = json.loads(text)
+
+        if isinstance(obj, dict):
+            return obj
+    except json.JSONDecodeError:
+        pass
+
+    decoder = json.JSONDecoder()
+    idx = text.find('{')
+
+    while idx != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, idx)
+
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+
+        idx = text.find('{', idx + 1)
+
+    return None
+
+class JSONObjectStreamParser(object):
+    """Consumes a token stream and tells when the first top-level JSON object is closed. 
+    Every character is scanned once, so it can be fed token by token."""
+
+    def __init__(self) -> None:
+        self._chunks: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        if self.complete:
+            return True
+
+        for i, c in enumerate(chunk):
+            if not self._started:
+                if c != '{':
+                    continue
+
+                self._started = True
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == '\\':
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+
+            elif c == '"':
+                self._in_string = True
+
+            elif c == '{':
+                self._depth += 1
+
+            elif c == '}':
+                self._depth -= 1
+
+                if self._depth == 0:
+                    self._chunks.append(chunk[:i + 1])
+                    self.complete = True
+                    return True
+
+        self._chunks.append(chunk)
+        return False
+
+    def __call__(self, chunk: str) -> bool:
+        return self.feed(chunk)
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._chunks)
+
+    def result(self) -> Optional[dict]:
+        return extract_json_object(self.text)
+
+def estimate_result_size(result: InferenceResult) -> int:
+    size = 256 # rough per-item overhead
+
+    for v in [result.result, result.error]:
+        if v is not None:
+            size += len(v)
+
+    if result.onchain_data is not None:
+        size += len(result.onchain_data.model_dump_json())
+
+    return size
+
 @singleton
-class SimpleCacheMechanism(object):
-    MAX_CACHE_ITEMS = 2048
+class InferenceResultStore(object):
+    """Process-wide, thread-safe store of inference results. Evicts by LRU, age and total size;
+    results that are still executing are never evicted."""
 
-    def __init__(self, *args, **kwargs):
-        self._log = {}
-        self._que = queue.Queue()
+    def __init__(
+        self, 
+        max_items: int = C.INFERENCE_STORE_MAX_ITEMS, 
+        max_bytes: int = C.INFERENCE_STORE_MAX_BYTES, 
+        ttl: float = C.INFERENCE_STORE_TTL,
+        path: Optional[str] = C.INFERENCE_STORE_PATH,
+        retention: float = C.INFERENCE_STORE_RETENTION,
+        *args, **kwargs
+    ):
+        # optional write-through copy on disk, used to resume receipts after a restart
+        self._persistent: Optional[SQLiteResultStore] = None
+
+        if path:
+            logger.info(f"Persisting inference results to {path}")
+            self._persistent = SQLiteResultStore(path, retention)
+
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._log: OrderedDict[str, InferenceResult] = OrderedDict() # LRU order
+        self._committed_at: OrderedDict[str, float] = OrderedDict() # commit order
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+
+        self._cond = threading.Condition()
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _remove(self, id: str):
+        self._log.pop(id, None)
+        self._committed_at.pop(id, None)
+        self._total_bytes -= self._sizes.pop(id, 0)
+
+    def _expire(self, now: float):
+        expired = []
+
+        for id, committed_at in self._committed_at.items():
+            if now - committed_at <= self.ttl:
+                break
+
+            if self._log[id].state != InferenceState.EXECUTING:
+                expired.append(id)
+
+        for id in expired:
+            self._remove(id)
+
+        self._expirations += len(expired)
+
+    def _evict(self, keep: str):
+        evicted = []
+        n_items, n_bytes = len(self._log), self._total_bytes
+
+        for id, result in self._log.items():
+            if n_items <= self.max_items and n_bytes <= self.max_bytes:
+                break
+
+            if result.state == InferenceState.EXECUTING or id == keep:
+                continue
+
+            evicted.append(id)
+            n_items -= 1
+            n_bytes -= self._sizes[id]
+
+        for id in evicted:
+            self._remove(id)
+
+        self._evictions += len(evicted)
 
     def commit(self, result: InferenceResult) -> InferenceResult:
-        self._log[result.id] = result
-        self._que.put(result.id)
+        now = time.time()
+
+        with self._cond:
+            self._remove(result.id)
+
+            self._log[result.id] = result
+            self._committed_at[result.id] = now
+            self._sizes[result.id] = estimate_result_size(result)
+            self._total_bytes += self._sizes[result.id]
+
+            self._expire(now)
+            self._evict(keep=result.id)
+
+            callbacks = []
+            if result.state != InferenceState.EXECUTING:
+                callbacks = self._callbacks.pop(result.id, [])
+                self._cond.notify_all()
+
+        if self._persistent is not None and result.state != InferenceState.EXECUTING:
+            try:
+                self._persistent.put(result)
+            except Exception as err:
+                logger.error(f"Failed to persist inference result {result.id}: {err}")
 
-        while len(self._log) > self.MAX_CACHE_ITEMS:
-            top = self._que.get()
-            self._log.pop(top)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as err:
+                logger.error(f"Callback for {result.id} failed: {err}")
+
+        return result
+
+    def _lookup(self, id: str) -> Optional[InferenceResult]:
+        result = self._log.get(id)
+
+        if result is not None and result.state != InferenceState.EXECUTING \
+            and time.time() - self._committed_at[id] > self.ttl:
+            self._remove(id)
+            self._expirations += 1
+            result = None
 
         return result
 
     def get(self, id: str, default=None) -> Optional[InferenceResult]:
-        return self._log.get(id, default)
+        with self._cond:
+            result = self._lookup(id)
+
+            if result is not None:
+                self._hits += 1
+                self._log.move_to_end(id)
+                return result
+
+        result = self._persistent.get(id) if self._persistent is not None else None
+
+        with self._cond:
+            if result is None:
+                self._misses += 1
+                return default
+
+            self._disk_hits += 1
+
+            # a newer result may have been committed in the meantime
+            if id not in self._log:
+                self._log[id] = result
+                self._committed_at[id] = time.time()
+                self._sizes[id] = estimate_result_size(result)
+                self._total_bytes += self._sizes[id]
+                self._evict(keep=id)
+
+            return self._log[id]
+
+    def wait(self, id: str, timeout: Optional[float]=None) -> Optional[InferenceResult]:
+        """Blocks until the result of `id` is no longer executing or `timeout` expires"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (self._log.get(id) is None or self._log[id].state != InferenceState.EXECUTING),
+                timeout=timeout
+            )
+
+        return self.get(id)
+
+    def add_done_callback(self, id: str, callback: Callable[[], None]) -> bool:
+        """Registers a one-shot callback fired when the result of `id` is completed. 
+        Returns False (and does not register) if there is nothing to wait for."""
+
+        with self._cond:
+            result: Optional[InferenceResult] = self._log.get(id)
+
+            if result is None or result.state != InferenceState.EXECUTING:
+                return False
+
+            self._callbacks.setdefault(id, []).append(callback)
+            return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "items": len(self._log),
+                "bytes": self._total_bytes,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations
+            }
+
+# kept for backward compatibility
+SimpleCacheMechanism = InferenceResultStore
 
 from enum import Enum
 import sys
@@ -63,4 +336,63 @@ def print_color(msg, color: ConsoleColor = ConsoleColor.WHITE, file = None, end
     if file is None or not hasattr(file, 'write'):
         file = sys.stdout
 
-    print(f'{color.value}{msg}{ConsoleColor.COLOR_OFF.value}', file=file, end=end, flush=flush)
\ No newline at end of file
+    print(f'{color.value}{msg}{ConsoleColor.COLOR_OFF.value}', file=file, end=end, flush=flush)
+
+@singleton
+class BackgroundEventLoop(object):
+    """An asyncio event loop running forever in a daemon thread, shared by asyncio-native components"""
+
+    def __init__(self, *args, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="dagent-event-loop", daemon=True)
+        self._thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+@singleton
+class TimerThread(object):
+    """A heap of timers served by one daemon thread, for deadlines too numerous to start a thread each"""
+
+    def __init__(self, *args, **kwargs):
+        self._timers = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="dagent-timer", daemon=True)
+        self._thread.start()
+
+    def call_later(self, delay: float, fn: Callable[[], None]) -> list:
+        """Returns a handle for `cancel`"""
+        entry = [time.time() + delay, next(self._seq), fn]
+
+        with self._cond:
+            heapq.heappush(self._timers, entry)
+            self._cond.notify()
+
+        return entry
+
+    def cancel(self, entry: list):
+        # dropped lazily once it is due
+        with self._cond:
+            entry[2] = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while len(self._timers) == 0 or self._timers[0][0] > time.time():
+                    timeout = None if len(self._timers) == 0 else self._timers[0][0] - time.time()
+                    self._cond.wait(timeout=timeout)
+
+                _, _, fn = heapq.heappop(self._timers)
+
+            if fn is None:
+                continue
+
+            try:
+                fn()
+            except Exception as err:
+                logger.error(f"Timer callback failed: {err}")
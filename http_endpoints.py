@@ -14,6 +14,10 @@ __all__ = [
 def health_check():
     return PlainTextResponse("", status_code=200)
 
+@router.get("/stats")
+def stats():
+    return JSONResponse(content=AutoServiceProvider().stats(), status_code=200)
+
 @api_v1_router.post("/init-chat")
 def init_chat():
     return JSONResponse(content={
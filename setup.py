@@ -16,7 +16,6 @@ dependencies = [
     "python-dotenv==1.0.1",
     "requests==2.32.3",
     "pydantic==2.9.2",
-    "bs4==0.0.2",
     "singleton-decorator==1.0.0"
 ]
 
@@ -32,6 +31,9 @@ setup(
     packages=find_packages(exclude=["dagent.service.py"], include=["dagent", "dagent.*"]),
     python_requires=">=3.10.0",
     install_requires=dependencies,
+    extras_require={
+        "http2": ["httpx[http2]>=0.27.0"]
+    },
     keywords="Python, LLM, Decentralized AI, Modular design",
     classifiers=[
         "Development Status :: 5 - Production/Stable",
@@ -20,6 +20,7 @@ def get_opt():
     parser.add_argument("-e", "--eternal", type=str, default="configs/eternal.json", help="Host of the daemon")
     parser.add_argument("-f", "--output", type=str, default=None, help="Output file")
     parser.add_argument("-d", "--debug", action="store_true", default=False, help="Debug mode")
+    parser.add_argument("--no-stream", action="store_true", default=False, help="Wait for the full response instead of streaming it")
     return parser.parse_args()
 
 def main():
@@ -91,12 +92,29 @@ def main():
             
             print_color("> You: ", end="", flush=True, color=ConsoleColor.JUST_BOLD)
             while not input_message.strip(" \t\n\r"):
-                input_message = sys.stdin.readline().strip(" \t\n\r")
+                line = sys.stdin.readline()
+
+                # end of input (e.g. piped messages), stop like Ctrl-C
+                if not line:
+                    raise KeyboardInterrupt
+
+                input_message = line.strip(" \t\n\r")
+
+            mission = models.Mission(system_reminder="", task=input_message)
 
             try:
-                resp: models.DAgentResponse = agent.step(
-                    models.Mission(system_reminder="", task=input_message)
-                )
+                if opt.no_stream:
+                    resp: models.DAgentResponse = agent.step(mission)
+                    print_color(f"> Eternal: " + resp.content, color=ConsoleColor.GREEN)
+
+                else:
+                    print_color(f"> Eternal: ", end="", flush=True, color=ConsoleColor.GREEN)
+
+                    for delta in agent.stream(mission):
+                        print_color(delta, end="", flush=True, color=ConsoleColor.GREEN)
+
+                    print()
+                    resp: models.DAgentResponse = agent.last_response
 
             except Exception as e:
                 import traceback
@@ -104,8 +122,6 @@ def main():
                 logger.error("An error occurred: %s", e)
                 break 
 
-            print_color(f"> Eternal: " + resp.content, color=ConsoleColor.GREEN)
-
             if resp.onchain_data is not None:
                 console_width = os.get_terminal_size().columns
                 print_color("-" * min(console_width, 120), color=ConsoleColor.RED)